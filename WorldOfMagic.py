@@ -1,111 +1,556 @@
 import pygame
+import os
 import sys
 from player import Player
 from enemy import Enemy
-from map import Map
 from camera import Camera
-from item import Item
+from item import Item, get_item_type, get_image_path
 from scoreboard import Scoreboard, ReplayButton, VictoryScreen
+from spawner import Spawner
+from animation import animations
+from dirty_rects import DirtyRectTracker
+from broadphase import SpatialHash, IndexedGroup, EntityGroup
+from flow_field import FlowField
+from timestep import FixedTimestep
+from profiler import FrameProfiler
+from gc_control import GCController
+from run_history import RunHistory
+from state_stream import StateStreamServer, POSITION_STEP, PLAYER_ID, PLAYER_STATES, KIND_PLAYER, KIND_ENEMY, KIND_ITEM
+from level_manager import LevelManager
+from asset_cache import cache
+
+try:
+    from enemy_swarm import EnemySwarm
+except ImportError: # NumPy is not installed, fall back to Enemy sprites
+    EnemySwarm = None
 
 # Variables
 WIDTH = 1024
 HEIGHT = 576
+LEVEL_PATH = os.path.join("assets", "levels", "level-1.tmx")
+LEVEL_PATHS = [LEVEL_PATH] # Played in this order, the portal item leads to the next level
+PROFIT_QUOTA = 624 # Points needed for a victory
+
+# Simulation and rendering rates. The player physics are tuned per simulation step at 60 steps per second.
+SIM_RATE = 60
+MAX_CATCH_UP_STEPS = 5
+MAX_FPS = 60 # 0 renders as fast as possible
+INTERPOLATE = False # Smooths the player's movement when rendering faster than SIM_RATE
+
+DIRTY_RECTS = False # Only presents the changed parts of the screen, for software-rendered displays
+
+# Above 1, the sprites are kept at the size of their art instead of being upscaled when loaded, the world is drawn on a
+# WIDTH / RENDER_SCALE x HEIGHT / RENDER_SCALE surface and upscaled to the window in one step. The HUD is drawn at full size.
+# Must be a whole number that divides WIDTH and HEIGHT. 1 draws the world straight onto the window.
+RENDER_SCALE = 1
+USE_ENEMY_SWARM = True # Updates all ghosts in one vectorized step when NumPy is available
+
+# F3 toggles the performance overlay, F4 runs cProfile for PROFILE_FRAMES frames and writes the stats to PROFILE_PATH,
+# F5 toggles counting the memory allocated per frame, shown in the overlay
+PROFILE_FRAMES = 300
+PROFILE_PATH = "worldofmagic.prof"
+
+GC_FREEZE = False # Only collects garbage at level transitions and on the replay screen, never in the middle of play
+
+RUN_HISTORY_PATH = "run_history.db" # SQLite database of finished runs for the leaderboard, None keeps no history
+
+STREAM_PORT = None # Streams the game state to spectators on this local port, e.g. 8765. Watch with state_stream.py.
 
 class WorldOfMagic():
-    def __init__(self):
+    def __init__(self, run_history_path=RUN_HISTORY_PATH):
+        # Only whole factors keep every pixel of the art when the world is upscaled
+        if not isinstance(RENDER_SCALE, int) or RENDER_SCALE < 1 or WIDTH % RENDER_SCALE or HEIGHT % RENDER_SCALE:
+            raise ValueError(f"RENDER_SCALE must be a whole number that divides {WIDTH}x{HEIGHT}, not {RENDER_SCALE}")
+
         pygame.init()
         
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption('World Of Magic')
 
-        self.map = Map(self.screen, "assets\levels\level-1.tmx")
+        # The first level is loaded behind a loading screen, the next one in the background while playing
+        self.levels = LevelManager(self.screen, LEVEL_PATHS, self.get_level_images)
+        self.level_index = 0
+        self.next_level_index = None
+        self.map = self.levels.load(self.level_index, self.draw_loading_screen)
 
-        self.camera = Camera(self.map.tmx_map.width * self.map.block_size,
-                             self.map.tmx_map.height * self.map.block_size)
+        self.camera = Camera(self.map.width, self.map.height)
+
+        # The surface the world is drawn on before it is upscaled to the window. Map coordinates are its pixels, so
+        # drawing, collisions and the camera all work at the resolution of the art.
+        self.native_size = RENDER_SCALE > 1
+        if self.native_size:
+            self.render_target = pygame.Surface((WIDTH // RENDER_SCALE, HEIGHT // RENDER_SCALE)).convert()
+        else:
+            self.render_target = self.screen
                              
-        self.player = Player(self.screen, self.camera)
+        self.player = Player(self.render_target, self.camera, self.native_size)
 
-        self.scoreboard = Scoreboard(self.player)
+        self.scoreboard = Scoreboard(self.player, PROFIT_QUOTA)
         self.replay_button = ReplayButton(WIDTH, HEIGHT)
         self.victory_screen = VictoryScreen(self.screen, self)
 
-    def run(self):
-        items = pygame.sprite.Group()
-        enemies = pygame.sprite.Group()
-
-        # Items
-        self.item1 = Item(self.screen, self.map, self.camera, 1960, 190, "sneakers.png", 2345, items, self) # Boost
-        self.item2 = Item(self.screen, self.map, self.camera, 1960, 1590, "stars.png", 521, items, self)
-        self.item3 = Item(self.screen, self.map, self.camera, 1100, 920, "shovel.png", 394, items, self)
-        self.item4 = Item(self.screen, self.map, self.camera, 1100, 1140, "jetpack.png", 1234, items, self) # Jetpack
-        self.item5 = Item(self.screen, self.map, self.camera, 30, 490, "clownhorn.png", 241, items, self)
-        self.item6 = Item(self.screen, self.map, self.camera, 890, 830, "portal.png", 3456, items, self) # Portal
-        items.add(self.item1, self.item2, self.item3, self.item4, self.item5, self.item6)
-
-        # Enemies
-        self.enemy1 = Enemy(self.map, 1200, 200, enemies)
-        self.enemy2 = Enemy(self.map, 1700, 200, enemies)
-        self.enemy3 = Enemy(self.map, 100, 520, enemies)
-        self.enemy4 = Enemy(self.map, 400, 520, enemies)
-        self.enemy5 = Enemy(self.map, 700, 520, enemies)
-        self.enemy6 = Enemy(self.map, 1700, 200, enemies)
-        enemies.add(self.enemy1, self.enemy2, self.enemy3, self.enemy4, self.enemy5)
+        self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep(SIM_RATE, MAX_CATCH_UP_STEPS)
+        self.dirty_rects = DirtyRectTracker()
+        self.profiler = FrameProfiler()
+        self.gc_control = GCController()
+        self.run_history = RunHistory(run_history_path) if run_history_path is not None else None
+        self.state_stream = StateStreamServer(port=STREAM_PORT) if STREAM_PORT is not None else None
+
+        # The current run, recorded in the history once it ends
+        self.run_steps = 0
+        self.run_recorded = False
+
+        # Reused every frame to draw all visible enemies and items with one Surface.blits() call
+        self.entity_blits = []
+
+        self.spawn_entities()
+        self.levels.prefetch(self.level_index + 1)
+        self.request_best_score()
+
+        # The state the level starts in, restored on replay
+        self.level_snapshot = self.snapshot()
+
+        # Everything loaded so far lives as long as the level, collect once and keep the collector away from it
+        self.gc_control.set_enabled(GC_FREEZE)
+
+    def spawn_entities(self):
+        """
+        Sets up the level's items and enemies. They are created from the map's spawn points once the camera gets close to them.
+        """
+
+        # Both groups register their entities in one spatial hash, which finds what the player touches
+        self.broadphase = SpatialHash()
+        self.items = EntityGroup(self.broadphase)
+        self.enemies = IndexedGroup(self.broadphase)
+        self.enemy_swarm = EnemySwarm(native_size=self.native_size) if USE_ENEMY_SWARM and EnemySwarm is not None else None
+
+        # One search from the player's cell steers every enemy
+        self.flow_field = FlowField(self.map)
+
+        self.spawner = Spawner(self.map.spawns, {"item": self.create_item, "enemy": self.create_enemy})
+
+    def enter_level(self, index):
+        """
+        Switches to another level, loading it first if it isn't ready yet.
+
+        Parameters:
+        - index (int): The index of the level in LEVEL_PATHS.
+        """
+
+        if index != self.level_index:
+            self.levels.unload(self.level_index)
+        self.level_index = index
+        self.map = self.levels.load(index, self.draw_loading_screen)
+
+        self.camera.width = self.map.width
+        self.camera.height = self.map.height
+        self.camera.camera.size = (self.map.width, self.map.height)
+
+        self.spawn_entities()
+        self.levels.prefetch(index + 1)
+
+    def get_level_name(self):
+        """
+        Returns the name the current level is stored under in the run history.
+
+        Returns:
+        - str: The file name of the level without its extension, e.g. "level-1".
+        """
 
+        return os.path.splitext(os.path.basename(LEVEL_PATHS[self.level_index]))[0]
+
+    def request_best_score(self):
+        """
+        Asks the run history for the current level's best score, which the scoreboard shows once it arrives.
+        """
+
+        if self.run_history is not None:
+            self.scoreboard.show_best_score(self.run_history.get_level_stats(self.get_level_name()))
+
+    def end_run(self, outcome):
+        """
+        Records the current run in the run history, once per run. Writing happens in the background.
+
+        Parameters:
+        - outcome (str): How the run ended: "victory", "fired" or "died".
+        """
+
+        if self.run_recorded or self.run_history is None:
+            return
+
+        self.run_recorded = True
+        player = self.player
+        self.run_history.record(self.get_level_name(), self.run_steps / SIM_RATE, player.score, max(player.health, 0),
+                                player.items_collected, outcome)
+
+    def get_level_images(self, spawns):
+        """
+        Lists the images used by a level's items, so they can be decoded while the level loads.
+
+        Parameters:
+        - spawns (list): The level's spawn points.
+
+        Returns:
+        - list: The file paths to the images.
+        """
+
+        return [get_image_path(spawn["properties"]["pathname"]) for spawn in spawns if spawn["type"] == "item"]
+
+    def draw_loading_screen(self, progress):
+        """
+        Draws a loading screen with a progress bar.
+
+        Parameters:
+        - progress (float): How much of the level has been loaded, from 0 to 1.
+        """
+
+        # Keep the window responsive
+        pygame.event.pump()
+
+        width, height = self.screen.get_size()
+        self.screen.fill((3, 0, 46))
+
+        font = cache.get_font(None, 36)
+        text = font.render(f"Loading... {int(progress * 100)}%", True, (255, 255, 255))
+        self.screen.blit(text, text.get_rect(center=(width // 2, height // 2 - 30)))
+
+        bar = pygame.Rect(0, 0, width // 2, 20)
+        bar.center = (width // 2, height // 2 + 10)
+        pygame.draw.rect(self.screen, (255, 255, 255), (bar.x, bar.y, int(bar.width * progress), bar.height))
+        pygame.draw.rect(self.screen, (255, 255, 255), bar, 2)
+        pygame.display.flip()
+
+    def create_item(self, spawn):
+        """
+        Creates an item from a spawn point with "pathname" and "point_value" properties.
+
+        Parameters:
+        - spawn (dict): The spawn point.
+
+        Returns:
+        - tuple: The item and the group it belongs to.
+        """
+
+        properties = spawn["properties"]
+        item_type = get_item_type(properties["pathname"], properties["point_value"], self.native_size)
+        return Item(item_type, int(spawn["x"]), int(spawn["y"])), self.items
+
+    def create_enemy(self, spawn):
+        """
+        Creates an enemy from a spawn point.
+
+        Parameters:
+        - spawn (dict): The spawn point.
+
+        Returns:
+        - tuple: The enemy and the group it belongs to, or the swarm ghost and its swarm.
+        """
+
+        if self.enemy_swarm is not None:
+            return self.enemy_swarm.spawn(int(spawn["x"]), int(spawn["y"])), self.enemy_swarm
+
+        return Enemy(self.map, int(spawn["x"]), int(spawn["y"]), self.enemies, self.native_size), self.enemies
+
+    def run(self):
         while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif self.replay_button.check_click(event):
-                    self.reset()
-                    self.replay_button.visible = False
+            frame_time = self.clock.tick(MAX_FPS) / 1000
+            self.profiler.begin_frame()
 
-            # Game background
-            self.screen.fill((3, 0, 46))
+            with self.profiler.scope("events"):
+                self.handle_events()
 
-            # Set camera to always follow player
-            self.camera.update(self.player, self.screen.get_width(), self.screen.get_height())
+            # Continue loading the next level a little every frame
+            with self.profiler.scope("level_loading"):
+                self.levels.update()
 
-            # Rendering the player and all map tiles on the game screen and camera's position for proper positioning and scrolling.            
-            for sprite in [self.player] + self.map.tiles_group.sprites():
-                self.screen.blit(sprite.image, self.camera.apply(sprite))
+            # Run as many fixed simulation steps as the elapsed time calls for, then draw the frame once
+            for _ in range(self.timestep.advance(frame_time)):
+                self.step()
 
-            self.player.move()
-            self.player.update(self.map)
+            self.render(self.timestep.alpha if INTERPOLATE else 1.0)
+            self.profiler.end_frame()
+            self.gc_control.end_frame()
 
-            for enemy in enemies.sprites():
-                enemy.draw(self.screen, self.camera)
-                enemy.update(self.player)
+    def quit(self):
+        """
+        Writes the remaining runs, stops streaming and level loading, and exits the game.
+        """
 
-            for item in items.sprites():
-                item.draw()
-                item.update(self.player)
+        if self.run_history is not None:
+            self.run_history.close()
+        if self.state_stream is not None:
+            self.state_stream.close()
+        self.levels.close()
+        pygame.quit()
+        sys.exit()
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.quit()
+            elif self.replay_button.check_click(event):
+                self.reset()
+                self.replay_button.visible = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler.set_overlay(not self.profiler.overlay_visible)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                self.profiler.start_cprofile(PROFILE_FRAMES, PROFILE_PATH)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                self.profiler.track_allocations(not self.profiler.tracking_allocations)
+
+    def step(self, keys=None):
+        """
+        Advances the game simulation by one fixed timestep.
+
+        Parameters:
+        - keys: The pressed keys to move the player with. Defaults to the keyboard state.
+        """
+
+        profiler = self.profiler
+
+        with profiler.scope("animation"):
+            self.update_animations()
+        with profiler.scope("collision"):
+            self.update_player(keys)
+        with profiler.scope("spawning"):
+            self.update_spawns()
+        with profiler.scope("enemy_update"):
+            self.update_enemies()
+        with profiler.scope("player_contacts"):
+            self.update_collisions()
 
-            self.scoreboard.draw(self.screen)
-            self.scoreboard.update()
+        self.run_steps += 1
+        if self.player.health <= 0:
+            self.end_run("died")
 
-            # Check for game over
-            if self.player.health <= 0:
-                self.screen.fill((0, 0, 0))
-                self.replay_button.visible = True
+        if self.state_stream is not None:
+            with profiler.scope("streaming"):
+                self.state_stream.publish(self.get_stream_state())
+
+        self.scoreboard.update()
+
+    def get_stream_state(self):
+        """
+        Captures the player and the live entities near it for spectators, with positions quantized to POSITION_STEP pixels.
+
+        Returns:
+        - dict: Maps entity ids to (kind, x, y, frame, health, score) tuples. Spawned entities are numbered after their spawn point.
+        """
+
+        player = self.player
+        frame = PLAYER_STATES.index(player.state) * 16 + player.frame_index if player.state in PLAYER_STATES else player.frame_index
+        state = {PLAYER_ID: (KIND_PLAYER, player.rect.x // POSITION_STEP, player.rect.y // POSITION_STEP, frame, player.health, player.score)}
+
+        swarm = self.enemy_swarm
+        for record in self.spawner.get_active_records():
+            entity = record.entity
+            if record.spawn["type"] == "item":
+                values = (KIND_ITEM, entity.rect.x // POSITION_STEP, entity.rect.y // POSITION_STEP, 0, 0, entity.points)
+            elif swarm is not None:
+                index = entity.index
+                values = (KIND_ENEMY, int(swarm.x[index]) // POSITION_STEP, int(swarm.y[index]) // POSITION_STEP, int(swarm.frame_index[index]), 0, 0)
             else:
-                self.replay_button.visible = False
+                values = (KIND_ENEMY, entity.rect.x // POSITION_STEP, entity.rect.y // POSITION_STEP, entity.frame_index, 0, 0)
+            state[record.index + 1] = values
+        return state
+
+    def update_animations(self):
+        # One clock reading per step drives every animation, cooldown and timer
+        animations.tick()
+        animations.update((self.player,))
+        animations.update(self.enemies)
+
+    def update_player(self, keys=None):
+        self.player.move(keys)
+        self.player.update(self.map)
+
+    def update_spawns(self):
+        self.spawner.update(self.camera.get_viewport(*self.render_target.get_size()))
+
+    def update_enemies(self):
+        self.flow_field.update(self.player.rect)
+
+        for enemy in self.enemies.sprites():
+            enemy.chase(self.flow_field)
+            self.broadphase.move(enemy)
+
+        if self.enemy_swarm is not None:
+            self.enemy_swarm.update(self.player, self.flow_field)
+
+    def update_collisions(self):
+        # Only the enemies and items in the cells around the player need a rect test, and only touching rects a pixel test
+        for entity in self.broadphase.query(self.player.rect):
+            # Skip entities removed by an earlier contact this step, e.g. when the victory screen resets the level
+            if entity.alive() and entity.rect.colliderect(self.player.rect) and pygame.sprite.collide_mask(entity, self.player):
+                entity.collide_with_player(self.player, self)
+
+    def render(self, alpha=1.0):
+        """
+        Draws the current game state on the screen.
+
+        Parameters:
+        - alpha (float): How far the frame lies between the previous and the current simulation step, used to interpolate the player's position.
+        """
+
+        profiler = self.profiler
+
+        with profiler.scope("camera"):
+            # Set camera to always follow player
+            player_rect = self.player.get_render_rect(alpha)
+            self.camera.follow(player_rect, *self.render_target.get_size())
+
+        with profiler.scope("tile_render"):
+            self.draw_map(player_rect)
+        with profiler.scope("entity_render"):
+            self.draw_entities()
+        if self.render_target is not self.screen:
+            with profiler.scope("upscale"):
+                pygame.transform.scale(self.render_target, self.screen.get_size(), self.screen)
+        with profiler.scope("hud"):
+            self.draw_hud()
+            profiler.draw_overlay(self.screen, self.clock.get_fps())
+        with profiler.scope("present"):
+            self.present(alpha)
+
+    def present(self, alpha=1.0):
+        """
+        Shows the drawn frame on the display, either completely or only the parts that changed.
+
+        Parameters:
+        - alpha (float): The interpolation value the frame was drawn with.
+        """
 
-            # Update and draw the replay button
-            self.replay_button.update()
-            self.replay_button.draw(self.screen)
+        # An upscaled frame is presented whole, its pixels don't line up with the drawn positions
+        if not DIRTY_RECTS or RENDER_SCALE > 1 or self.profiler.overlay_visible:
+            pygame.display.update()
+            return
 
+        # Scrolling or switching to the game over screen changes every pixel
+        view = (self.camera.camera.topleft, self.player.health <= 0)
+        dirty_rects = self.dirty_rects.get_dirty_rects(view, self.get_drawables(alpha))
+        if dirty_rects is None:
             pygame.display.update()
-            pygame.time.Clock().tick(60)
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+
+    def get_drawables(self, alpha=1.0):
+        """
+        Lists everything drawn on top of the map, with its screen position.
+
+        Parameters:
+        - alpha (float): The interpolation value the frame was drawn with.
+
+        Returns:
+        - list: (key, image, (x, y)) entries.
+        """
+
+        offset_x, offset_y = self.camera.camera.topleft
+        player_rect = self.player.get_render_rect(alpha)
+        drawables = [(self.player, self.player.image, (player_rect.x + offset_x, player_rect.y + offset_y))]
+
+        for sprite in self.enemies.sprites() + self.items.sprites():
+            drawables.append((sprite, sprite.image, (sprite.rect.x + offset_x, sprite.rect.y + offset_y)))
+
+        if self.enemy_swarm is not None:
+            for index, frame, position in self.enemy_swarm.get_visible(self.screen, self.camera):
+                drawables.append((("ghost", index), frame, position))
+
+        drawables.extend(self.scoreboard.get_drawables())
+        if self.replay_button.visible:
+            drawables.append((self.replay_button, self.replay_button.image, self.replay_button.rect.topleft))
+        return drawables
+
+    def draw_map(self, player_rect):
+        # Game background
+        self.render_target.fill((3, 0, 46))
+
+        # Rendering the player and the visible map chunks on the game screen and camera's position for proper positioning and scrolling.
+        offset_x, offset_y = self.camera.camera.topleft
+        self.render_target.blit(self.player.image, (player_rect.x + offset_x, player_rect.y + offset_y))
+        self.map.draw(self.camera, self.render_target)
+
+    def draw_entities(self):
+        width, height = self.render_target.get_size()
+        entity_blits = self.entity_blits
+        entity_blits.clear()
+
+        self.camera.add_blits(entity_blits, self.enemies.sprites(), width, height)
+        if self.enemy_swarm is not None:
+            entity_blits.extend([(frame, position) for _, frame, position in self.enemy_swarm.get_visible(self.render_target, self.camera)])
+        self.camera.add_blits(entity_blits, self.items.sprites(), width, height)
+
+        self.render_target.blits(entity_blits, False)
+
+    def draw_hud(self):
+        self.scoreboard.draw(self.screen)
+
+        # Check for game over
+        if self.player.health <= 0:
+            self.screen.fill((0, 0, 0))
+            self.replay_button.visible = True
+        else:
+            self.replay_button.visible = False
+
+        # Update and draw the replay button
+        self.replay_button.update()
+        self.replay_button.draw(self.screen)
 
     def show_victory_screen(self):
-        if self.player.score >= 624:
-            self.victory_screen.show("VICTORY! You meet the profit quota!")
+        # List the level's best runs, including this one, once the history has answered
+        self.end_run("victory" if self.player.score >= PROFIT_QUOTA else "fired")
+        leaderboard = self.run_history.get_top_runs(5, self.get_level_name()) if self.run_history is not None else None
+
+        if self.player.score >= PROFIT_QUOTA and self.level_index + 1 < len(self.levels):
+            # reset() continues with the next level when the victory screen is closed
+            self.next_level_index = self.level_index + 1
+            self.victory_screen.show("VICTORY! On to the next level!", leaderboard)
+        elif self.player.score >= PROFIT_QUOTA:
+            self.victory_screen.show("VICTORY! You meet the profit quota!", leaderboard)
         else:
-            self.victory_screen.show("YOU ARE FIRED! You did not meet the profit quota!")
+            self.victory_screen.show("YOU ARE FIRED! You did not meet the profit quota!", leaderboard)
+
+    def snapshot(self):
+        """
+        Captures the state of the level. Items and enemies start over from the map's spawn points.
+
+        Returns:
+        - dict: The level state.
+        """
+
+        return {
+            "player": self.player.snapshot(),
+        }
 
     def reset(self):
-        pygame.quit()
-        WorldOfMagic().run()
+        """
+        Restarts the level in place, reusing the loaded map and assets, or starts the next level after a victory.
+        """
+
+        self.player.restore(self.level_snapshot["player"])
+
+        # Go on to the next level after the portal, otherwise replay the current one
+        if self.next_level_index is not None:
+            self.enter_level(self.next_level_index)
+            self.next_level_index = None
+        else:
+            self.spawner.reset()
+            self.flow_field.reset()
+            if self.enemy_swarm is not None:
+                self.enemy_swarm.clear()
+
+        # A new run starts
+        self.run_steps = 0
+        self.run_recorded = False
+        self.request_best_score()
+
+        # The screen is paused anyway, collect the previous attempt's or level's garbage now
+        self.gc_control.safe_point()
+
+        # Don't try to catch up on the time spent on the game over or victory screen
+        self.timestep.reset()
+        self.clock.tick()
+        self.dirty_rects.reset()
 
-WorldOfMagic().run()
\ No newline at end of file
+if __name__ == "__main__":
+    WorldOfMagic().run()
\ No newline at end of file
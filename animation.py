@@ -0,0 +1,63 @@
+import pygame
+
+class AnimationSystem:
+    def __init__(self):
+        """
+        Initializes an AnimationSystem with one clock and one set of frame tables for every animated sprite.
+
+        An animated sprite has these attributes:
+        - frames (tuple): The frame table it is currently playing.
+        - frame_index (int): The index of the frame being shown.
+        - animation_timer (int): The time in milliseconds when the frame was last advanced.
+        - animation_speed (float): The time in seconds each frame is shown.
+        - image (pygame.Surface): The frame being shown, set by the animation system.
+        """
+
+        self.frame_tables = {}
+        self.time = 0
+
+    def get_frames(self, name, load_frames):
+        """
+        Returns a named frame table, building it only the first time it is requested.
+
+        Parameters:
+        - name (str): The name of the frame table, e.g. "ghost".
+        - load_frames (function): A function returning the list of frames, called once.
+
+        Returns:
+        - tuple: The shared frame table.
+        """
+
+        frames = self.frame_tables.get(name)
+        if frames is None:
+            frames = tuple(load_frames())
+            self.frame_tables[name] = frames
+        return frames
+
+    def tick(self, time=None):
+        """
+        Reads the time once for the current simulation step. Sprites use this time instead of calling pygame.time.get_ticks() themselves.
+
+        Parameters:
+        - time (int): The simulation time in milliseconds, for runs that don't follow the real clock. Defaults to pygame.time.get_ticks().
+        """
+
+        self.time = pygame.time.get_ticks() if time is None else time
+
+    def update(self, sprites):
+        """
+        Advances the animation of every sprite whose current frame has been shown long enough.
+
+        Parameters:
+        - sprites (iterable): The animated sprites.
+        """
+
+        current_time = self.time
+        for sprite in sprites:
+            if current_time - sprite.animation_timer > sprite.animation_speed * 1000:
+                sprite.animation_timer = current_time
+                sprite.frame_index = (sprite.frame_index + 1) % len(sprite.frames)
+                sprite.image = sprite.frames[sprite.frame_index]
+
+# Shared by every animated sprite in the game
+animations = AnimationSystem()
@@ -0,0 +1,157 @@
+import pygame
+
+class AssetCache:
+    def __init__(self):
+        """
+        Initializes an AssetCache that keeps one shared copy of every loaded image variant.
+
+        Images are keyed by (path, area, scale, flip), so every sprite asking for the same variant gets the same surface.
+        The cached surfaces are shared and must not be drawn on.
+        """
+
+        self.images = {}
+        self.fonts = {}
+
+        # Images decoded from their files but not converted for the display yet
+        self.decoded_images = {}
+
+        # Collision masks of the shared images, keyed by the image
+        self.masks = {}
+
+    def get_image(self, path, scale=None, flip=False, area=None):
+        """
+        Returns an image, loading and transforming it only the first time it is requested.
+
+        Parameters:
+        - path (str): The file path to the image file.
+        - scale (float or tuple): A scale factor, or the (width, height) to scale the image to. None keeps the original size.
+        - flip (bool): True to mirror the image horizontally.
+        - area (tuple): An (x, y, width, height) area of the image to cut out, e.g. one frame of a sprite sheet.
+
+        Returns:
+        - pygame.Surface: The shared image.
+        """
+
+        key = (path, area, scale, flip)
+        image = self.images.get(key)
+        if image is None:
+            image = self.load_image(path, scale, flip, area)
+            self.images[key] = image
+        return image
+
+    def load_image(self, path, scale, flip, area):
+        """
+        Creates an image variant, reusing the cached untransformed versions it is built from.
+
+        Parameters:
+        - path (str): The file path to the image file.
+        - scale (float or tuple): A scale factor or target (width, height), or None.
+        - flip (bool): True to mirror the image horizontally.
+        - area (tuple): An (x, y, width, height) area to cut out, or None.
+
+        Returns:
+        - pygame.Surface: The new image.
+        """
+
+        if flip:
+            return pygame.transform.flip(self.get_image(path, scale, False, area), True, False)
+
+        if scale is not None:
+            image = self.get_image(path, None, False, area)
+            if isinstance(scale, tuple):
+                size = scale
+            else:
+                size = (int(image.get_width() * scale), int(image.get_height() * scale))
+            return pygame.transform.scale(image, size)
+
+        if area is not None:
+            return self.get_image(path).subsurface(pygame.Rect(area)).copy()
+
+        image = self.decoded_images.pop(path, None)
+        if image is None:
+            image = pygame.image.load(path)
+        return image.convert_alpha()
+
+    def decode_image(self, path):
+        """
+        Reads and decodes an image file without converting it for the display, so it can run on a worker thread.
+        The first get_image() call for the image only has to convert it.
+
+        Parameters:
+        - path (str): The file path to the image file.
+        """
+
+        if (path, None, None, False) not in self.images and path not in self.decoded_images:
+            self.decoded_images[path] = pygame.image.load(path)
+
+    def preload(self, requests):
+        """
+        Loads a list of images ahead of time, e.g. while a loading screen is shown.
+
+        Parameters:
+        - requests (list): Dictionaries with the keyword arguments of get_image, e.g. {"path": ..., "scale": 2}.
+        """
+
+        for request in requests:
+            self.get_image(**request)
+
+    def get_mask(self, image):
+        """
+        Returns the collision mask of a shared image, creating it only the first time it is requested.
+
+        Parameters:
+        - image (pygame.Surface): A cached image, e.g. an animation frame.
+
+        Returns:
+        - pygame.mask.Mask: The mask of the image's opaque pixels.
+        """
+
+        mask = self.masks.get(image)
+        if mask is None:
+            mask = pygame.mask.from_surface(image)
+            self.masks[image] = mask
+        return mask
+
+    def get_font(self, name, size):
+        """
+        Returns a shared font, creating it only the first time it is requested.
+
+        Parameters:
+        - name (str): The name of a system font, or None for pygame's default font.
+        - size (int): The font size.
+
+        Returns:
+        - pygame.font.Font: The shared font.
+        """
+
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(None, size) if name is None else pygame.font.SysFont(name, size)
+            self.fonts[key] = font
+        return font
+
+    def memory_usage(self):
+        """
+        Returns how much pixel memory the cached images take up.
+
+        Returns:
+        - int: The size of all cached images in bytes.
+        """
+
+        return sum(image.get_pitch() * image.get_height() for image in self.images.values())
+
+    def clear(self):
+        """
+        Removes all images and fonts from the cache.
+        """
+
+        self.images.clear()
+        self.fonts.clear()
+        self.decoded_images.clear()
+        self.masks.clear()
+
+# Shared by every sprite in the game
+cache = AssetCache()
@@ -0,0 +1,288 @@
+import os
+
+# Render without a window. This has to be set before pygame initializes its display.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Keep stdout clean for the JSON report
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import platform
+import sys
+import threading
+import pygame
+from asset_cache import cache
+from profiler import FrameProfiler, percentile
+from state_stream import StateStreamServer, SpectatorClient
+from WorldOfMagic import WorldOfMagic, PROFIT_QUOTA
+
+# Scripted input: (number of frames, keys held down during those frames)
+DEFAULT_SCRIPT = [
+    (60, []),
+    (90, ["RIGHT"]),
+    (20, ["RIGHT", "SPACE"]),
+    (60, ["RIGHT"]),
+    (30, []),
+    (120, ["LEFT"]),
+    (20, ["LEFT", "UP"]),
+    (90, ["LEFT"]),
+    (20, ["SPACE"]),
+    (60, ["RIGHT"]),
+]
+
+class ScriptedKeys:
+    def __init__(self, key_names):
+        """
+        Initializes a ScriptedKeys object that stands in for pygame.key.get_pressed().
+
+        Parameters:
+        - key_names (list): The names of the pressed keys, e.g. ["LEFT", "SPACE"].
+        """
+
+        self.pressed = {getattr(pygame, "K_" + name) for name in key_names}
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+class ScriptedInput:
+    def __init__(self, script):
+        """
+        Initializes a ScriptedInput object that replays a fixed input sequence, looping when it reaches the end.
+
+        Parameters:
+        - script (list): A list of (frames, key names) pairs.
+        """
+
+        self.frames = []
+        for frames, key_names in script:
+            keys = ScriptedKeys(key_names)
+            self.frames.extend([keys] * frames)
+
+    def get_pressed(self, frame):
+        """
+        Returns the keys held down on a given frame.
+
+        Parameters:
+        - frame (int): The frame number.
+
+        Returns:
+        - ScriptedKeys: The pressed keys.
+        """
+
+        return self.frames[frame % len(self.frames)]
+
+class HeadlessWorldOfMagic(WorldOfMagic):
+    def __init__(self):
+        """
+        Initializes the game without a visible window and without blocking screens.
+        """
+
+        # Benchmarks and bots don't add to the player's run history
+        super().__init__(run_history_path=None)
+        self.results = []
+
+    def show_victory_screen(self):
+        # Record the outcome instead of waiting for a key press
+        self.results.append({"score": self.player.score, "victory": self.player.score >= PROFIT_QUOTA})
+
+class Benchmark:
+    def __init__(self, game, script):
+        """
+        Initializes a Benchmark that runs the game's update and draw paths as fast as possible.
+
+        Parameters:
+        - game (HeadlessWorldOfMagic): The game to run.
+        - script (list): A list of (frames, key names) pairs to replay as input.
+        """
+
+        self.game = game
+        self.input = ScriptedInput(script)
+
+    def run(self, frame_count, track_allocations=False):
+        """
+        Runs the game for a number of frames, one simulation step per frame, timing each phase with the game's profiler.
+
+        Parameters:
+        - frame_count (int): The number of frames to run.
+        - track_allocations (bool): True to also count the memory allocated in every frame. This slows every frame down.
+        """
+
+        # Keep the samples of every frame
+        self.game.profiler = profiler = FrameProfiler(history=frame_count)
+        profiler.enabled = True
+        profiler.track_allocations(track_allocations)
+
+        for frame in range(frame_count):
+            pygame.event.pump()
+            profiler.begin_frame()
+            self.game.step(self.input.get_pressed(frame))
+            self.game.render()
+            profiler.end_frame()
+            self.game.gc_control.end_frame()
+
+        profiler.track_allocations(False)
+
+    def report(self, warmup=0):
+        """
+        Summarizes the timings.
+
+        Parameters:
+        - warmup (int): The number of frames at the start to leave out of the allocation counts, while entities are still being spawned.
+
+        Returns:
+        - dict: The frame and per-phase timings in milliseconds, ready to be written as JSON.
+        """
+
+        profiler = self.game.profiler
+        total_time = sum(profiler.frame_times)
+        report = {
+            "frames": len(profiler.frame_times),
+            "total_s": round(total_time, 4),
+            "fps": round(len(profiler.frame_times) / total_time, 1) if total_time else 0,
+            "frame": summarize(profiler.frame_times),
+            "phases": {phase: summarize(samples) for phase, samples in profiler.phase_times.items()},
+            "hitches": profiler.get_hitch_histogram(),
+            "gc": {
+                "freeze": self.game.gc_control.enabled,
+                "safe_point_collections": self.game.gc_control.safe_point_collections,
+                "forced_collections": self.game.gc_control.forced_collections,
+                "middle_collections": self.game.gc_control.middle_collections,
+                "old_collections": self.game.gc_control.old_collections,
+            },
+            "results": self.game.results,
+            "asset_cache": {"images": len(cache.images), "bytes": cache.memory_usage()},
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+        }
+
+        if profiler.allocated_blocks:
+            blocks = sorted(list(profiler.allocated_blocks)[warmup:])
+            allocated_bytes = sorted(list(profiler.allocated_bytes)[warmup:])
+            report["allocations"] = {
+                "warmup_frames": warmup,
+                "blocks_per_frame": summarize_counts(blocks),
+                "peak_bytes_per_frame": summarize_counts(allocated_bytes),
+                "gc_collections": profiler.gc_collections,
+                "gc_pause": summarize(profiler.gc_pauses),
+            }
+        return report
+
+def summarize(samples):
+    """
+    Summarizes a list of durations.
+
+    Parameters:
+    - samples (list): Durations in seconds.
+
+    Returns:
+    - dict: The total, mean, median, 99th percentile and maximum in milliseconds.
+    """
+
+    if not samples:
+        return {}
+
+    ordered = sorted(samples)
+    return {
+        "total_ms": round(sum(ordered) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "p50_ms": round(percentile(ordered, 0.5) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+def summarize_counts(ordered):
+    """
+    Summarizes a sorted list of per-frame counts.
+
+    Parameters:
+    - ordered (list): The counts in ascending order.
+
+    Returns:
+    - dict: The mean, median, 99th percentile, minimum and maximum.
+    """
+
+    if not ordered:
+        return {}
+
+    return {
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "p50": percentile(ordered, 0.5),
+        "p99": percentile(ordered, 0.99),
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+def watch_stream(spectator):
+    """
+    Receives and acknowledges streamed states until the server closes the connection, like a spectator would.
+
+    Parameters:
+    - spectator (SpectatorClient): The connected client.
+    """
+
+    try:
+        while True:
+            spectator.receive()
+    except (ConnectionError, OSError):
+        pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run World Of Magic headless and report frame timings as JSON.")
+    parser.add_argument("--frames", type=int, default=1000, help="number of frames to run")
+    parser.add_argument("--script", help="JSON file with a list of [frames, [key names]] input steps")
+    parser.add_argument("--output", help="file to write the JSON report to (default: stdout)")
+    parser.add_argument("--gc-freeze", action="store_true", help="only collect garbage at safe points, like GC_FREEZE")
+    parser.add_argument("--track-allocations", action="store_true", help="count the memory blocks allocated per frame (slower)")
+    parser.add_argument("--warmup", type=int, default=120, help="frames left out of the allocation counts")
+    parser.add_argument("--allocation-budget", type=int,
+                        help="fail if the median frame after the warmup keeps more than this many new memory blocks, implies --track-allocations")
+    parser.add_argument("--stream", action="store_true", help="stream the game state to a local spectator and report the bandwidth")
+    args = parser.parse_args(argv)
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script) as script_file:
+            script = json.load(script_file)
+
+    game = HeadlessWorldOfMagic()
+    game.gc_control.set_enabled(args.gc_freeze)
+
+    if args.stream:
+        game.state_stream = StateStreamServer()
+        spectator = SpectatorClient("127.0.0.1", game.state_stream.port)
+        watcher = threading.Thread(target=watch_stream, args=(spectator,), daemon=True)
+        watcher.start()
+
+    benchmark = Benchmark(game, script)
+    benchmark.run(args.frames, args.track_allocations or args.allocation_budget is not None)
+    results = benchmark.report(args.warmup)
+
+    if args.stream:
+        results["stream"] = {"clients": game.state_stream.get_stats(), "received_messages": spectator.messages_received}
+        game.state_stream.close()
+        watcher.join()
+        spectator.close()
+
+    # Python's free lists can keep a block of a temporary object alive, so a steady frame may show up as one block
+    over_budget = False
+    if args.allocation_budget is not None:
+        median_blocks = results["allocations"]["blocks_per_frame"].get("p50", 0)
+        over_budget = median_blocks > args.allocation_budget
+        results["allocation_budget"] = {"blocks": args.allocation_budget, "passed": not over_budget}
+
+    report = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report + "\n")
+    else:
+        print(report)
+
+    pygame.quit()
+    if over_budget:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,182 @@
+import pygame
+
+class SpatialHash:
+    def __init__(self, cell_size=128):
+        """
+        Initializes a SpatialHash that buckets entities by the grid cells their rectangles overlap.
+
+        Parameters:
+        - cell_size (int): The width and height in pixels of each cell.
+        """
+
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entity_cells = {}
+
+    def get_cells(self, rect):
+        """
+        Returns the cells overlapped by a rectangle.
+
+        Parameters:
+        - rect (pygame.Rect): The rectangle in map coordinates.
+
+        Returns:
+        - list: The (column, row) cells.
+        """
+
+        left = rect.left // self.cell_size
+        top = rect.top // self.cell_size
+        right = (rect.right - 1) // self.cell_size
+        bottom = (rect.bottom - 1) // self.cell_size
+        return [(x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)]
+
+    def insert(self, entity):
+        """
+        Adds an entity to the cells its rectangle overlaps.
+
+        Parameters:
+        - entity (pygame.sprite.Sprite): The entity to add.
+        """
+
+        cells = self.get_cells(entity.rect)
+        self.entity_cells[entity] = cells
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(entity)
+
+    def remove(self, entity):
+        """
+        Removes an entity from the hash.
+
+        Parameters:
+        - entity (pygame.sprite.Sprite): The entity to remove.
+        """
+
+        for cell in self.entity_cells.pop(entity, ()):
+            bucket = self.cells[cell]
+            bucket.remove(entity)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, entity):
+        """
+        Updates the cells of an entity after its rectangle has moved.
+
+        Parameters:
+        - entity (pygame.sprite.Sprite): The entity that moved.
+        """
+
+        if self.entity_cells.get(entity) != self.get_cells(entity.rect):
+            self.remove(entity)
+            self.insert(entity)
+
+    def query(self, rect):
+        """
+        Returns the entities whose cells overlap a rectangle. These are only candidates, their rectangles may not touch it.
+
+        Parameters:
+        - rect (pygame.Rect): The rectangle in map coordinates.
+
+        Returns:
+        - list: The candidate entities, each listed once.
+        """
+
+        candidates = {}
+        for cell in self.get_cells(rect):
+            for entity in self.cells.get(cell, ()):
+                candidates[entity] = True
+        return list(candidates)
+
+class IndexedGroup(pygame.sprite.Group):
+    def __init__(self, spatial_hash, *sprites):
+        """
+        Initializes a sprite group that keeps its sprites registered in a spatial hash while they are in the group.
+
+        Parameters:
+        - spatial_hash (SpatialHash): The spatial hash to register the sprites with.
+        - sprites: Sprites to add to the group.
+        """
+
+        self.spatial_hash = spatial_hash
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.spatial_hash.insert(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.spatial_hash.remove(sprite)
+
+class EntityGroup:
+    def __init__(self, spatial_hash):
+        """
+        Initializes a group of lightweight entity records, e.g. items, that keeps them registered in a spatial hash while they are in the group.
+
+        It offers the parts of the pygame.sprite.Group interface the game uses, without requiring the entities to be sprites.
+        An entity belongs to at most one group and stores it in its group attribute.
+
+        Parameters:
+        - spatial_hash (SpatialHash): The spatial hash to register the entities with.
+        """
+
+        self.spatial_hash = spatial_hash
+
+        # A dict keeps the entities in the order they were added, like a sprite group
+        self.entities = {}
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    def sprites(self):
+        """
+        Returns the entities in the group.
+
+        Returns:
+        - list: A copy of the entities, safe to iterate while entities are removed.
+        """
+
+        return list(self.entities)
+
+    def has(self, entity):
+        return entity in self.entities
+
+    def add(self, entity):
+        """
+        Adds an entity to the group, if it isn't in it already.
+
+        Parameters:
+        - entity: The entity record to add.
+        """
+
+        if entity.group is self:
+            return
+        if entity.group is not None:
+            entity.group.remove(entity)
+
+        entity.group = self
+        self.entities[entity] = True
+        self.spatial_hash.insert(entity)
+
+    def remove(self, entity):
+        """
+        Removes an entity from the group. Its state is kept.
+
+        Parameters:
+        - entity: The entity record to remove.
+        """
+
+        if entity.group is self:
+            entity.group = None
+            del self.entities[entity]
+            self.spatial_hash.remove(entity)
+
+    def empty(self):
+        """
+        Removes every entity from the group.
+        """
+
+        for entity in self.sprites():
+            self.remove(entity)
@@ -27,6 +27,42 @@ class Camera:
 
         return target.rect.move(self.camera.topleft)
 
+    def add_blits(self, blit_sequence, sprites, width, height):
+        """
+        Adds the sprites that are on the screen to a sequence for pygame.Surface.blits(), at their screen positions.
+
+        The camera offset is added to the coordinates directly, no Rect is created for each sprite.
+
+        Parameters:
+        - blit_sequence (list): The (image, (x, y)) entries to add to.
+        - sprites (iterable): The sprites to draw.
+        - width (int): The width of the surface the world is drawn on.
+        - height (int): The height of the surface the world is drawn on.
+        """
+
+        offset_x, offset_y = self.camera.topleft
+        append = blit_sequence.append
+        for sprite in sprites:
+            rect = sprite.rect
+            x = rect.x + offset_x
+            y = rect.y + offset_y
+            if x < width and y < height and x + rect.width > 0 and y + rect.height > 0:
+                append((sprite.image, (x, y)))
+
+    def get_viewport(self, width, height):
+        """
+        Returns the part of the map that is visible on the screen.
+
+        Parameters:
+        - width (int): The width of the game window.
+        - height (int): The height of the game window.
+
+        Returns:
+        - pygame.Rect: The visible area in map coordinates.
+        """
+
+        return pygame.Rect(-self.camera.x, -self.camera.y, width, height)
+
     def update(self, target, width, height):
         """
         Updates the camera position based on the position of the target and limits scrolling to the size of the map.
@@ -37,8 +73,20 @@ class Camera:
         - height (int): The height of the game window or map.
         """
 
-        x = -target.rect.x + width // 2
-        y = -target.rect.y + height // 2
+        self.follow(target.rect, width, height)
+
+    def follow(self, rect, width, height):
+        """
+        Centers the camera on a rectangle and limits scrolling to the size of the map.
+
+        Parameters:
+        - rect (pygame.Rect): The rectangle that the camera should follow.
+        - width (int): The width of the game window or map.
+        - height (int): The height of the game window or map.
+        """
+
+        x = -rect.x + width // 2
+        y = -rect.y + height // 2
 
         # Limit scrolling to the size of the map
         x = min(0, x)  # Left
@@ -46,4 +94,5 @@ class Camera:
         x = max(-(self.width - width), x)  # Right
         y = max(-(self.height - height), y)  # Bottom
 
-        self.camera = pygame.Rect(x, y, self.width, self.height)
\ No newline at end of file
+        # Move the existing rectangle instead of creating a new one every frame
+        self.camera.topleft = (x, y)
\ No newline at end of file
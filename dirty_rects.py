@@ -0,0 +1,60 @@
+import pygame
+
+class DirtyRectTracker:
+    def __init__(self, max_rects=32):
+        """
+        Initializes a DirtyRectTracker that works out which parts of the screen changed since the last frame.
+
+        Parameters:
+        - max_rects (int): Above this many changed areas a full screen update is used instead.
+        """
+
+        self.max_rects = max_rects
+        self.previous_view = None
+        self.previous_drawables = {}
+
+    def get_dirty_rects(self, view, drawables):
+        """
+        Compares the drawn images with the previous frame.
+
+        Parameters:
+        - view (tuple): Anything that changes the whole screen when it changes, e.g. the camera offset.
+        - drawables (iterable): (key, image, (x, y)) entries for everything drawn on top of the background this frame.
+
+        Returns:
+        - list: The screen rectangles to update, or None if the whole screen has to be updated.
+        """
+
+        current_drawables = {key: (image, position) for key, image, position in drawables}
+        previous_drawables = self.previous_drawables
+        full_update = view != self.previous_view
+
+        self.previous_view = view
+        self.previous_drawables = current_drawables
+        if full_update:
+            return None
+
+        dirty_rects = []
+        for key, drawn in current_drawables.items():
+            previous = previous_drawables.get(key)
+            if previous != drawn:
+                dirty_rects.append(pygame.Rect(drawn[1], drawn[0].get_size()))
+                if previous is not None:
+                    dirty_rects.append(pygame.Rect(previous[1], previous[0].get_size()))
+
+        # Whatever disappeared has to be cleared
+        for key, previous in previous_drawables.items():
+            if key not in current_drawables:
+                dirty_rects.append(pygame.Rect(previous[1], previous[0].get_size()))
+
+        if len(dirty_rects) > self.max_rects:
+            return None
+        return dirty_rects
+
+    def reset(self):
+        """
+        Forces a full screen update on the next frame.
+        """
+
+        self.previous_view = None
+        self.previous_drawables = {}
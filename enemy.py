@@ -1,8 +1,26 @@
 import pygame
 import os
+from asset_cache import cache
+from animation import animations
+
+def load_ghost_frames(parent_path="assets/enemies/", scale_factor=3):
+    """
+    Loads the ghost's animation frames from its sprite sheet.
+
+    Parameters:
+    - parent_path (str): The folder containing the sprite sheet.
+    - scale_factor (float): How much to scale up the 16 pixel ghost. None keeps the 32 pixel frames of the sheet.
+
+    Returns:
+    - list: The scaled frames.
+    """
+
+    sheet_path = os.path.join(parent_path, "ghost.png")
+    frame_size = (int(16 * scale_factor), int(16 * scale_factor)) if scale_factor is not None else None
+    return [cache.get_image(sheet_path, frame_size, area=(i * 32, 0, 32, 32)) for i in range(4)]
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, map_instance, x, y, enemies_group):
+    def __init__(self, map_instance, x, y, enemies_group, native_size=False):
         """
         Initializes an Enemy object.
 
@@ -11,20 +29,20 @@ class Enemy(pygame.sprite.Sprite):
         - x (int): The initial x-coordinate of the enemy on the map.
         - y (int): The initial y-coordinate of the enemy on the map.
         - enemies_group (pygame.sprite.Group): The group containing all enemy sprites.
+        - native_size (bool): True to keep the frames at the size they are drawn in, for a world that is upscaled as a whole.
         """
 
         super().__init__()
         self.map = map_instance
         self.enemies_group = enemies_group
 
-        # Load enemy animation frames
+        # Load enemy animation frames, one frame table shared by all enemies
         self.parent_path = "assets/enemies/"
-        self.monster_sheet = pygame.image.load(os.path.join(self.parent_path, "ghost.png")).convert_alpha()
+        self.scale_factor = None if native_size else 3
+        self.monster_frames = animations.get_frames("ghost-native" if native_size else "ghost",
+                                                    lambda: load_ghost_frames(self.parent_path, self.scale_factor))
+        self.frames = self.monster_frames
 
-        # Scaling enemy
-        self.scale_factor = 3
-        self.monster_frames = [pygame.transform.scale(self.monster_sheet.subsurface(pygame.Rect(i * 32, 0, 32, 32)), (int(16 * self.scale_factor), int(16 * self.scale_factor))) for i in range(4)]
-       
         self.frame_index = 0
         self.image = self.monster_frames[self.frame_index]
 
@@ -32,36 +50,57 @@ class Enemy(pygame.sprite.Sprite):
         self.rect.x = x
         self.rect.y = y
 
-        # Animation settings
+        # Animation settings, the frames are advanced by the shared animation system
         self.animation_speed = 0.2
-        self.animation_timer = pygame.time.get_ticks()
+        self.animation_timer = animations.time
 
         self.health = 100
 
         self.hit_cooldown = 1000  # in milliseconds
-        self.last_hit_time = pygame.time.get_ticks()
+        self.last_hit_time = animations.time
 
-    def update(self, player):
+        # Chasing settings. The enemy doesn't stray further than leash pixels from where it spawned.
+        self.speed = 2
+        self.leash = 256
+        self.home = (x, y)
+
+    def chase(self, flow_field):
         """
-        Updates the enemy's animation and checks for collisions with the player.
+        Moves the enemy one step along the flow field towards the player.
 
         Parameters:
-        - player (Player): The player object.
+        - flow_field (FlowField): The shared flow field leading to the player.
+        """
+
+        direction_x, direction_y = flow_field.get_direction(*self.rect.center)
+        if direction_x or direction_y:
+            home_x, home_y = self.home
+            self.rect.x = max(home_x - self.leash, min(home_x + self.leash, self.rect.x + direction_x * self.speed))
+            self.rect.y = max(home_y - self.leash, min(home_y + self.leash, self.rect.y + direction_y * self.speed))
+
+    def collide_with_player(self, player, game_instance):
         """
+        Handles the player touching the enemy, as found by the game's broad-phase collision pass.
 
-        # Animation
-        current_time = pygame.time.get_ticks()
-        if current_time - self.animation_timer > self.animation_speed * 1000:
-            self.animation_timer = current_time
-            self.frame_index = (self.frame_index + 1) % len(self.monster_frames)
-            self.image = self.monster_frames[self.frame_index]
+        Parameters:
+        - player (Player): The player object.
+        - game_instance: The game the enemy belongs to.
+        """
 
         # Cooldown between hit
-        current_time = pygame.time.get_ticks()
+        current_time = animations.time
         if current_time - self.last_hit_time > self.hit_cooldown:
-            if pygame.sprite.collide_rect(self, player):
-                player.hit()
-                self.last_hit_time = current_time
+            player.hit()
+            self.last_hit_time = current_time
+
+    @property
+    def mask(self):
+        """
+        The collision mask of the current frame, used by pygame.sprite.collide_mask().
+        Masks are created once per frame and shared through the asset cache.
+        """
+
+        return cache.get_mask(self.image)
 
     def draw(self, screen, camera):
         """
@@ -0,0 +1,254 @@
+import numpy as np
+from animation import animations
+from asset_cache import cache
+from enemy import load_ghost_frames
+
+class SwarmGhost:
+    __slots__ = ("swarm", "index")
+
+    def __init__(self, swarm, index):
+        """
+        Initializes a SwarmGhost, a handle to one ghost stored in an EnemySwarm.
+
+        Parameters:
+        - swarm (EnemySwarm): The swarm holding the ghost's data.
+        - index (int): The ghost's slot in the swarm's arrays.
+        """
+
+        self.swarm = swarm
+        self.index = index
+
+    def alive(self):
+        """
+        Returns whether the ghost is active, mirroring pygame.sprite.Sprite.alive().
+
+        Returns:
+        - bool: True if the ghost is updated and drawn.
+        """
+
+        return bool(self.swarm.active[self.index])
+
+class EnemySwarm:
+    # One array per field, indexed by ghost slot
+    FIELDS = {
+        "x": np.int32,
+        "y": np.int32,
+        "home_x": np.int32,
+        "home_y": np.int32,
+        "frame_index": np.int32,
+        "animation_timer": np.int64,
+        "last_hit_time": np.int64,
+        "active": np.bool_,
+    }
+
+    def __init__(self, capacity=64, native_size=False):
+        """
+        Initializes an EnemySwarm that stores every ghost's state in NumPy arrays and updates them all in one vectorized step.
+
+        The ghosts behave like Enemy sprites: they cycle through the same frames every 0.2 seconds and hit the player
+        at most once per second each while touching it.
+
+        Parameters:
+        - capacity (int): The number of ghosts to allocate room for. The arrays grow when more are spawned.
+        - native_size (bool): True to keep the frames at the size they are drawn in, for a world that is upscaled as a whole.
+        """
+
+        # The same frame table as Enemy
+        if native_size:
+            self.monster_frames = animations.get_frames("ghost-native", lambda: load_ghost_frames(scale_factor=None))
+        else:
+            self.monster_frames = animations.get_frames("ghost", load_ghost_frames)
+        self.width, self.height = self.monster_frames[0].get_size()
+        self.monster_masks = [cache.get_mask(frame) for frame in self.monster_frames]
+
+        # Animation settings
+        self.animation_speed = 0.2
+        self.hit_cooldown = 1000  # in milliseconds
+
+        # Chasing settings, the same as Enemy
+        self.speed = 2
+        self.leash = 256
+
+        self.count = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """
+        Resizes the arrays, keeping the existing ghosts.
+
+        Parameters:
+        - capacity (int): The new number of slots.
+        """
+
+        for name, dtype in self.FIELDS.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if self.count:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def spawn(self, x, y):
+        """
+        Adds a new ghost to the swarm. It is not updated or drawn until it is added with add().
+
+        Parameters:
+        - x (int): The initial x-coordinate of the ghost on the map.
+        - y (int): The initial y-coordinate of the ghost on the map.
+
+        Returns:
+        - SwarmGhost: The handle of the new ghost.
+        """
+
+        if self.count == self.capacity:
+            self.allocate(self.capacity * 2)
+
+        index = self.count
+        self.count += 1
+
+        current_time = animations.time
+        self.x[index] = x
+        self.y[index] = y
+        self.home_x[index] = x
+        self.home_y[index] = y
+        self.frame_index[index] = 0
+        self.animation_timer[index] = current_time
+        self.last_hit_time[index] = current_time
+        self.active[index] = False
+        return SwarmGhost(self, index)
+
+    def add(self, ghost):
+        """
+        Activates a ghost, like adding a sprite to its group.
+
+        Parameters:
+        - ghost (SwarmGhost): The ghost to activate.
+        """
+
+        self.active[ghost.index] = True
+
+    def remove(self, ghost):
+        """
+        Deactivates a ghost, like removing a sprite from its group. Its state is kept.
+
+        Parameters:
+        - ghost (SwarmGhost): The ghost to deactivate.
+        """
+
+        self.active[ghost.index] = False
+
+    def clear(self):
+        """
+        Removes every ghost and frees their slots.
+        """
+
+        self.active[:self.count] = False
+        self.count = 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.active[:self.count]))
+
+    def update(self, player, flow_field=None):
+        """
+        Moves all active ghosts towards the player, advances their animation and hits the player with every ghost that touches it and is off cooldown.
+
+        Parameters:
+        - player (Player): The player object.
+        - flow_field (FlowField): The shared flow field leading to the player. Without one the ghosts stay in place.
+        """
+
+        count = self.count
+        active = self.active[:count]
+        current_time = animations.time
+
+        if flow_field is not None:
+            self.chase(flow_field)
+
+        # Animation
+        animation_timer = self.animation_timer[:count]
+        advance = active & (current_time - animation_timer > self.animation_speed * 1000)
+        animation_timer[advance] = current_time
+        frame_index = self.frame_index[:count]
+        frame_index[advance] = (frame_index[advance] + 1) % len(self.monster_frames)
+
+        # Cooldown between hit, then the same rect overlap test as pygame.sprite.collide_rect
+        last_hit_time = self.last_hit_time[:count]
+        x = self.x[:count]
+        y = self.y[:count]
+        player_rect = player.rect
+        touching = (active & (current_time - last_hit_time > self.hit_cooldown)
+                    & (x < player_rect.right) & (x + self.width > player_rect.left)
+                    & (y < player_rect.bottom) & (y + self.height > player_rect.top))
+
+        # Only the ghosts whose rects touch the player get a pixel test, like pygame.sprite.collide_mask
+        candidates = np.flatnonzero(touching)
+        if len(candidates):
+            player_mask = player.mask
+            for index, ghost_x, ghost_y, frame in zip(candidates.tolist(), x[candidates].tolist(), y[candidates].tolist(),
+                                                       frame_index[candidates].tolist()):
+                if player_mask.overlap(self.monster_masks[frame], (ghost_x - player_rect.x, ghost_y - player_rect.y)):
+                    last_hit_time[index] = current_time
+                    player.hit()
+
+    def chase(self, flow_field):
+        """
+        Moves all active ghosts one step along the flow field, looking up every ghost's direction at once.
+
+        Parameters:
+        - flow_field (FlowField): The shared flow field leading to the player.
+        """
+
+        count = self.count
+        active = self.active[:count]
+        x = self.x[:count]
+        y = self.y[:count]
+
+        # The cell under each ghost's center, ghosts outside the map don't move
+        column = (x + self.width // 2) // flow_field.block_size
+        row = (y + self.height // 2) // flow_field.block_size
+        inside = active & (column >= 0) & (column < flow_field.columns) & (row >= 0) & (row < flow_field.rows)
+        cells = np.where(inside, row * flow_field.columns + column, 0)
+
+        # Views of the flow field's arrays, nothing is copied
+        direction_x = np.frombuffer(flow_field.direction_x, dtype=np.int8)[cells]
+        direction_y = np.frombuffer(flow_field.direction_y, dtype=np.int8)[cells]
+
+        home_x = self.home_x[:count]
+        home_y = self.home_y[:count]
+        x[inside] = np.clip(x + direction_x * self.speed, home_x - self.leash, home_x + self.leash)[inside]
+        y[inside] = np.clip(y + direction_y * self.speed, home_y - self.leash, home_y + self.leash)[inside]
+
+    def get_visible(self, screen, camera):
+        """
+        Returns the active ghosts that are on the screen.
+
+        Parameters:
+        - screen (pygame.Surface): The surface where the ghosts will be drawn.
+        - camera (Camera): The camera object for transforming the ghosts' positions.
+
+        Returns:
+        - list: (slot index, frame, (x, y) screen position) for every visible ghost.
+        """
+
+        count = self.count
+        offset_x, offset_y = camera.camera.topleft
+        screen_x = self.x[:count] + offset_x
+        screen_y = self.y[:count] + offset_y
+        visible = (self.active[:count]
+                   & (screen_x < screen.get_width()) & (screen_x + self.width > 0)
+                   & (screen_y < screen.get_height()) & (screen_y + self.height > 0))
+
+        indices = np.flatnonzero(visible)
+        frames = self.monster_frames
+        return [(index, frames[frame], (x, y)) for index, frame, x, y in
+                zip(indices.tolist(), self.frame_index[indices].tolist(), screen_x[indices].tolist(), screen_y[indices].tolist())]
+
+    def draw(self, screen, camera):
+        """
+        Draws the active ghosts that are on the screen using the camera transformation.
+
+        Parameters:
+        - screen (pygame.Surface): The surface where the ghosts will be drawn.
+        - camera (Camera): The camera object for transforming the ghosts' positions.
+        """
+
+        screen.blits([(frame, position) for _, frame, position in self.get_visible(screen, camera)], False)
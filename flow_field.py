@@ -0,0 +1,141 @@
+import array
+import collections
+
+# The eight neighbours of a cell, straight ones first
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+class FlowField:
+    def __init__(self, map_instance, max_distance=24, update_interval=6):
+        """
+        Initializes a FlowField that gives every free map cell near the target the direction of the shortest path to it.
+
+        One breadth-first search from the target's cell is shared by all enemies, so steering an enemy is a single lookup
+        and the cost doesn't grow with the number of enemies. Cells with a tile are walls.
+
+        Parameters:
+        - map_instance (Map): The map whose tile grid to search.
+        - max_distance (int): How many cells from the target the search reaches. Cells further away have no direction.
+        - update_interval (int): The minimum number of updates between two searches.
+        """
+
+        self.tile_grid = map_instance.tile_grid
+        self.block_size = map_instance.block_size
+        self.columns = map_instance.level.width
+        self.rows = map_instance.level.height
+        self.max_distance = max_distance
+        self.update_interval = update_interval
+
+        # Direction of each cell, indexed by row * columns + column. (0, 0) for cells without a path.
+        self.direction_x = array.array("b", bytes(self.columns * self.rows))
+        self.direction_y = array.array("b", bytes(self.columns * self.rows))
+        self.no_directions = array.array("b", bytes(self.columns * self.rows))
+
+        self.target_cell = None
+        self.updates_since_search = update_interval
+
+    def get_cell(self, x, y):
+        """
+        Returns the cell containing a point.
+
+        Parameters:
+        - x (int): The x-coordinate on the map.
+        - y (int): The y-coordinate on the map.
+
+        Returns:
+        - tuple: The (column, row) cell.
+        """
+
+        return (int(x) // self.block_size, int(y) // self.block_size)
+
+    def update(self, target_rect):
+        """
+        Searches again from the target's cell if the target changed cells, at most once every update_interval updates.
+
+        Parameters:
+        - target_rect (pygame.Rect): The rectangle of the target, e.g. the player.
+        """
+
+        self.updates_since_search += 1
+        cell = self.get_cell(*target_rect.center)
+        if cell != self.target_cell and self.updates_since_search >= self.update_interval:
+            self.search(cell)
+
+    def search(self, target_cell):
+        """
+        Fills in the directions by a breadth-first search from the target cell.
+
+        Parameters:
+        - target_cell (tuple): The (column, row) cell to find paths to.
+        """
+
+        self.target_cell = target_cell
+        self.updates_since_search = 0
+
+        columns = self.columns
+        rows = self.rows
+        tile_grid = self.tile_grid
+        direction_x = self.direction_x
+        direction_y = self.direction_y
+
+        # Clear the directions of the previous search, in place so views of the arrays stay valid
+        direction_x[:] = self.no_directions
+        direction_y[:] = self.no_directions
+
+        target_x, target_y = target_cell
+        if not (0 <= target_x < columns and 0 <= target_y < rows):
+            return
+
+        distances = {target_cell: 0}
+        queue = collections.deque([target_cell])
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell] + 1
+            if distance > self.max_distance:
+                continue
+
+            x, y = cell
+            for step_x, step_y in NEIGHBOURS:
+                neighbour = (x + step_x, y + step_y)
+                if neighbour in distances or neighbour in tile_grid:
+                    continue
+                if not (0 <= neighbour[0] < columns and 0 <= neighbour[1] < rows):
+                    continue
+
+                # Don't cut diagonally past the corner of a wall
+                if step_x and step_y and ((x + step_x, y) in tile_grid or (x, y + step_y) in tile_grid):
+                    continue
+
+                distances[neighbour] = distance
+                queue.append(neighbour)
+
+                # Moving from the neighbour back to this cell gets one cell closer to the target
+                index = neighbour[1] * columns + neighbour[0]
+                direction_x[index] = -step_x
+                direction_y[index] = -step_y
+
+    def get_direction(self, x, y):
+        """
+        Returns the direction to move in from a point to get closer to the target.
+
+        Parameters:
+        - x (int): The x-coordinate on the map.
+        - y (int): The y-coordinate on the map.
+
+        Returns:
+        - tuple: The (x, y) direction, each -1, 0 or 1. (0, 0) if there is no path within reach.
+        """
+
+        column, row = self.get_cell(x, y)
+        if not (0 <= column < self.columns and 0 <= row < self.rows):
+            return (0, 0)
+
+        index = row * self.columns + column
+        return (self.direction_x[index], self.direction_y[index])
+
+    def reset(self):
+        """
+        Forgets the target, so the next update searches again right away.
+        """
+
+        self.target_cell = None
+        self.updates_since_search = self.update_interval
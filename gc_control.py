@@ -0,0 +1,91 @@
+import gc
+
+class GCController:
+    def __init__(self, enabled=False, young_limit=50000, middle_limit=10, old_limit=10):
+        """
+        Initializes a GCController that keeps Python's cyclic garbage collector from pausing in the middle of a frame.
+
+        While enabled, automatic collection is off. Everything alive at a safe point, e.g. right after a level has loaded,
+        is frozen, so the collections during play never have to look at it. Each safe point unfreezes and collects everything
+        first, so a level that was left behind is freed at the next one. Besides the safe points such as level transitions
+        and the replay screen, collections only run at the end of a frame in which more than young_limit new objects are
+        waiting. Like Python's own thresholds, every middle_limit-th of them also collects the middle generation and every
+        old_limit-th of those the oldest, so garbage that survived a collection is freed during a long level too. The frozen
+        objects are never looked at, so even those collections only cost as much as what was created since the safe point.
+
+        Parameters:
+        - enabled (bool): True to take over collection right away.
+        - young_limit (int): The number of new container objects after which the youngest generation is collected at the end of a frame.
+        - middle_limit (int): The number of young collections after which the middle generation is collected with it.
+        - old_limit (int): The number of middle collections after which the oldest generation is collected with them.
+        """
+
+        self.enabled = False
+        self.young_limit = young_limit
+        self.middle_limit = middle_limit
+        self.old_limit = old_limit
+        self.safe_point_collections = 0
+        self.forced_collections = 0
+        self.middle_collections = 0
+        self.old_collections = 0
+
+        if enabled:
+            self.set_enabled(True)
+
+    def set_enabled(self, enabled):
+        """
+        Takes over garbage collection, or gives it back to Python.
+
+        Parameters:
+        - enabled (bool): True to only collect at safe points.
+        """
+
+        if enabled == self.enabled:
+            return
+
+        self.enabled = enabled
+        if enabled:
+            gc.disable()
+            self.safe_point()
+        else:
+            gc.unfreeze()
+            gc.enable()
+
+    def safe_point(self):
+        """
+        Collects all garbage, including what was frozen at the last safe point, and freezes what survives.
+        Call it where a pause isn't noticed, e.g. behind a loading screen.
+        """
+
+        if not self.enabled:
+            return
+
+        # Frozen objects are never collected, the previous level's tiles would stay in memory for good
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        self.safe_point_collections += 1
+
+    def end_frame(self):
+        """
+        Collects the youngest generation if too many new objects are waiting, and the older ones with it when their turn
+        has come. Call it once per frame, after presenting.
+        """
+
+        if not self.enabled:
+            return
+
+        # The counts of the older generations are the collections of the generation below since they were last collected
+        young, middle, old = gc.get_count()
+        if young <= self.young_limit:
+            return
+
+        if old >= self.old_limit:
+            gc.collect(2)
+            self.old_collections += 1
+        elif middle >= self.middle_limit:
+            gc.collect(1)
+            self.middle_collections += 1
+        else:
+            gc.collect(0)
+            self.forced_collections += 1
@@ -1,80 +1,150 @@
-import pygame
 import os
+from asset_cache import cache
 
-class Item(pygame.sprite.Sprite):
-    def __init__(self, screen, map_instance, camera, x, y, pathname, points, items_group, game_instance):
+def get_image_path(pathname):
+    """
+    Returns the file path of an item image.
+
+    Parameters:
+    - pathname (str): The file name of the image, as given by the item's spawn point.
+
+    Returns:
+    - str: The file path to the image file.
+    """
+
+    return os.path.join("assets/items/", pathname)
+
+class ItemType:
+    __slots__ = ("pathname", "points", "image", "mask")
+
+    def __init__(self, pathname, points, scale_factor=2):
+        """
+        Initializes an ItemType that holds the data shared by every item with the same image and point value.
+
+        Parameters:
+        - pathname (str): The file name of the item's image, as given by its spawn point.
+        - points (int): The points associated with collecting the item.
+        - scale_factor (float): How much to scale up the 32 pixel image. None keeps the image as it is.
+        """
+
+        self.pathname = pathname
+        self.points = points
+
+        size = (int(32 * scale_factor),) * 2 if scale_factor is not None else None
+        self.image = cache.get_image(get_image_path(pathname), size)
+        self.mask = cache.get_mask(self.image)
+
+# One ItemType per (pathname, points, native_size), shared by all items and levels
+item_types = {}
+
+def get_item_type(pathname, points, native_size=False):
+    """
+    Returns the shared ItemType for an image and point value, creating it the first time it is needed.
+
+    Parameters:
+    - pathname (str): The file name of the item's image.
+    - points (int): The points associated with collecting the item.
+    - native_size (bool): True to keep the image at the size it is drawn in, for a world that is upscaled as a whole.
+
+    Returns:
+    - ItemType: The shared item type.
+    """
+
+    key = (pathname, points, native_size)
+    item_type = item_types.get(key)
+    if item_type is None:
+        item_type = ItemType(pathname, points, None if native_size else 2)
+        item_types[key] = item_type
+    return item_type
+
+class Item:
+    # An item only stores its position, its type and the group it is in. Everything else comes from the type.
+    __slots__ = ("type", "rect", "group")
+
+    def __init__(self, item_type, x, y):
         """
         Initializes an Item object.
 
         Parameters:
-        - screen (pygame.Surface): The surface where the item will be drawn.
-        - map_instance (Map): The map instance associated with the item.
-        - camera (Camera): The camera object for transforming the item's position.
+        - item_type (ItemType): The item's shared image and point value.
         - x (int): The initial x-coordinate of the item on the map.
         - y (int): The initial y-coordinate of the item on the map.
-        - pathname (str): The file path to the item's image file.
-        - points (int): The points associated with collecting the item.
-        - items_group (pygame.sprite.Group): The group containing all item sprites.
-        - game_instance: An instance of the game class associated with the item. # Main game file
         """
 
-        super().__init__()
-        self.screen = screen
-        self.map = map_instance
-        self.camera = camera
-        self.points = points
-        self.game_instance = game_instance
+        self.type = item_type
+        self.rect = item_type.image.get_rect(topleft=(x, y))
+        self.group = None
+
+    @property
+    def image(self):
+        return self.type.image
+
+    @property
+    def mask(self):
+        """
+        The collision mask of the item's image, used by pygame.sprite.collide_mask(). It is shared by the item type.
+        """
 
-        self.items_group = items_group
+        return self.type.mask
 
-        # Load item image
-        self.parent_path = "assets/items/"
-        self.item_image = pygame.image.load(os.path.join(self.parent_path, pathname)).convert_alpha()
+    @property
+    def points(self):
+        return self.type.points
 
-        # Scale item
-        self.scale_factor = 2
-        self.image = pygame.transform.scale(self.item_image, (int(32 * self.scale_factor), int(32 * self.scale_factor)))
+    def alive(self):
+        """
+        Returns whether the item is in a group, mirroring pygame.sprite.Sprite.alive().
+
+        Returns:
+        - bool: True if the item can be drawn and collected.
+        """
 
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        return self.group is not None
 
-    def update(self, player):
+    def collide_with_player(self, player, game_instance):
         """
-        Updates the item, checking for collisions with the player.
+        Handles the player touching the item, as found by the game's broad-phase collision pass.
 
         Parameters:
         - player (Player): The player object.
+        - game_instance: The game the item belongs to. # Main game file
         """
 
-        if pygame.sprite.collide_rect(self, player):
-            self.collect_item(player)
+        self.collect_item(player, game_instance)
 
-    def draw(self):
+    def draw(self, screen, camera):
         """
         Draws the item on the specified screen using the camera transformation.
+
+        Parameters:
+        - screen (pygame.Surface): The surface where the item will be drawn.
+        - camera (Camera): The camera object for transforming the item's position.
         """
 
-        self.screen.blit(self.image, self.camera.apply(self))
+        screen.blit(self.image, camera.apply(self))
 
-    def collect_item(self, player):
+    def collect_item(self, player, game_instance):
         """
         Handles the collection of the item by the player, updating points and applying special effects.
 
         Parameters:
         - player (Player): The player object.
+        - game_instance: The game the item belongs to, for the victory screen.
         """
 
         # print(f"Item collected! Points: {self.points}") # For debugging purpose
 
-        if self.points < 1000:
-            player.update_points(self.points)
+        # Remove the item first, the victory screen can reset the level and bring it back
+        self.group.remove(self)
+        player.items_collected += 1
+
+        points = self.type.points
+        if points < 1000:
+            player.update_points(points)
         else:
-            if self.points == 1234:
+            if points == 1234:
                 player.change_speed_y(-30)
-            elif self.points == 2345:
+            elif points == 2345:
                 player.change_speed_x(8)
-            elif self.points == 3456:
-                self.game_instance.show_victory_screen()
-
-        self.items_group.remove(self)
\ No newline at end of file
+            elif points == 3456:
+                game_instance.show_victory_screen()
\ No newline at end of file
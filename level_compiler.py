@@ -0,0 +1,264 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import pygame
+
+# File layout (little-endian):
+#   header      magic, version, map width and height in tiles, tile width and height,
+#               layer count, atlas tile count, spawn table size in bytes, source .tmx modification time
+#   layers      per layer: name length, name (padded to an even length), width * height uint16 atlas indices (0 = empty)
+#   atlas       every used tile as RGBA pixels, stacked vertically into one image
+#   spawns      the objects of the Tiled object layers as UTF-8 JSON
+MAGIC = b"WOML"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHHHHId")
+NAME_LENGTH = struct.Struct("<H")
+EXTENSION = ".womlvl"
+
+class CompiledLevel:
+    def __init__(self, path, convert=True):
+        """
+        Initializes a CompiledLevel by memory-mapping a compiled level file.
+
+        Parameters:
+        - path (str): The file path to the compiled level.
+        - convert (bool): False to leave the tile images for a later call to convert_tiles(), e.g. when loading on a worker thread.
+        """
+
+        with open(path, "rb") as level_file:
+            self.data = mmap.mmap(level_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.width, self.height, self.tilewidth, self.tileheight,
+         layer_count, tile_count, spawns_size, self.source_mtime) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled level")
+
+        offset = HEADER.size
+        view = self.view = memoryview(self.data)
+
+        # Tile layers, read straight from the mapped file
+        self.layers = []
+        layer_size = self.width * self.height * 2
+        for _ in range(layer_count):
+            (name_length,) = NAME_LENGTH.unpack_from(self.data, offset)
+            offset += NAME_LENGTH.size
+            name = bytes(view[offset:offset + name_length]).decode("utf-8")
+            offset += name_length + name_length % 2
+
+            if sys.byteorder == "little":
+                gids = view[offset:offset + layer_size].cast("H")
+            else:
+                gids = struct.unpack(f"<{self.width * self.height}H", view[offset:offset + layer_size])
+            self.layers.append((name, gids))
+            offset += layer_size
+
+        # Tile images, created by convert_tiles()
+        self.tile_count = tile_count
+        self.atlas_offset = offset
+        self.tiles = None
+        offset += tile_count * self.tilewidth * self.tileheight * 4
+
+        self.spawns = json.loads(bytes(view[offset:offset + spawns_size]).decode("utf-8"))
+
+        if convert:
+            self.convert_tiles()
+
+    def convert_tiles(self):
+        """
+        Creates the tile images, cut from one atlas surface. This needs the display, so it has to run on the main thread.
+        """
+
+        # Index 0 stands for an empty cell
+        self.tiles = [None]
+        if self.tile_count:
+            atlas_size = self.tile_count * self.tilewidth * self.tileheight * 4
+            with self.view[self.atlas_offset:self.atlas_offset + atlas_size] as atlas_pixels:
+                atlas = pygame.image.frombuffer(atlas_pixels, (self.tilewidth, self.tileheight * self.tile_count), "RGBA")
+                self.atlas = atlas.convert_alpha()
+                # The surface reads the mapped file until it's gone, which would keep close() from unmapping it
+                del atlas
+            for index in range(self.tile_count):
+                self.tiles.append(self.atlas.subsurface(pygame.Rect(0, index * self.tileheight, self.tilewidth, self.tileheight)))
+
+    def close(self):
+        """
+        Unmaps the compiled level file, so it can be compiled again while the game runs. The layers can't be read afterwards,
+        the tile images stay usable.
+        """
+
+        if self.data.closed:
+            return
+
+        for _, gids in self.layers:
+            if isinstance(gids, memoryview):
+                gids.release()
+        self.view.release()
+        self.data.close()
+
+def get_compiled_path(tmx_map_path):
+    """
+    Returns where the compiled version of a Tiled map is stored.
+
+    Parameters:
+    - tmx_map_path (str): The file path to the Tiled map file.
+
+    Returns:
+    - str: The file path to the compiled level.
+    """
+
+    return os.path.splitext(tmx_map_path)[0] + EXTENSION
+
+def load_tileset_image(filename, colorkey, **kwargs):
+    """
+    A pytmx image loader that cuts tiles out of a tileset image without converting them to the display's format,
+    so levels can be compiled without a display, e.g. on a worker thread.
+
+    Parameters:
+    - filename (str): The file path to the tileset image.
+    - colorkey (str): The tileset's transparent color as a hex string, or None.
+
+    Returns:
+    - function: Returns the tile in a rectangle of the image, flipped as given by its pytmx.TileFlags.
+    """
+
+    from pytmx.util_pygame import handle_transformation
+
+    image = pygame.image.load(filename)
+    if colorkey:
+        image.set_colorkey(pygame.Color(f"#{colorkey}"))
+
+    def load_tile(rect=None, flags=None):
+        tile = image.subsurface(rect) if rect else image
+        if flags:
+            tile = handle_transformation(tile, flags)
+        return tile
+
+    return load_tile
+
+def compile_level(tmx_map_path, output_path=None):
+    """
+    Compiles a Tiled map into the binary level format.
+
+    pytmx is only needed here, loading a compiled level does not parse any XML.
+    No display is needed, the tile pixels are read straight from the tileset images.
+
+    Parameters:
+    - tmx_map_path (str): The file path to the Tiled map file.
+    - output_path (str): Where to write the compiled level. Defaults to the .tmx path with the compiled extension.
+
+    Returns:
+    - str: The file path to the compiled level.
+    """
+
+    from pytmx import TiledMap, TiledTileLayer, TiledObjectGroup
+
+    output_path = output_path or get_compiled_path(tmx_map_path)
+    tmx_map = TiledMap(tmx_map_path, image_loader=load_tileset_image)
+
+    atlas_indices = {}
+    atlas_pixels = []
+    layers = []
+    spawns = []
+
+    for layer in tmx_map.layers:
+        if isinstance(layer, TiledTileLayer):
+            gids = [0] * (tmx_map.width * tmx_map.height)
+            for x, y, gid in layer:
+                tile = tmx_map.get_tile_image_by_gid(gid)
+                if not tile:
+                    continue
+
+                if gid not in atlas_indices:
+                    # Flatten colorkeys into per-pixel alpha so the tile looks the same once stored as RGBA
+                    tile_rgba = pygame.Surface((tmx_map.tilewidth, tmx_map.tileheight), pygame.SRCALPHA)
+                    tile_rgba.blit(tile, (0, 0))
+                    atlas_pixels.append(pygame.image.tobytes(tile_rgba, "RGBA"))
+                    atlas_indices[gid] = len(atlas_pixels)
+
+                gids[y * tmx_map.width + x] = atlas_indices[gid]
+            layers.append((layer.name, gids))
+
+        elif isinstance(layer, TiledObjectGroup):
+            for tiled_object in layer:
+                spawns.append({
+                    "layer": layer.name,
+                    "name": tiled_object.name,
+                    "type": tiled_object.type,
+                    "x": tiled_object.x,
+                    "y": tiled_object.y,
+                    "width": tiled_object.width,
+                    "height": tiled_object.height,
+                    "properties": dict(tiled_object.properties),
+                })
+
+    spawn_table = json.dumps(spawns).encode("utf-8")
+
+    # Written next to the final file and renamed when complete, so no reader ever sees a partly written level
+    level_fd, temporary_path = tempfile.mkstemp(".tmp", os.path.basename(output_path) + ".", os.path.dirname(output_path) or ".")
+    try:
+        with os.fdopen(level_fd, "wb") as level_file:
+            level_file.write(HEADER.pack(MAGIC, VERSION, tmx_map.width, tmx_map.height, tmx_map.tilewidth, tmx_map.tileheight,
+                                         len(layers), len(atlas_pixels), len(spawn_table), os.path.getmtime(tmx_map_path)))
+            for name, gids in layers:
+                encoded_name = name.encode("utf-8")
+                level_file.write(NAME_LENGTH.pack(len(encoded_name)))
+                level_file.write(encoded_name + b"\0" * (len(encoded_name) % 2))
+                level_file.write(struct.pack(f"<{len(gids)}H", *gids))
+            level_file.write(b"".join(atlas_pixels))
+            level_file.write(spawn_table)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    os.replace(temporary_path, output_path)
+
+    return output_path
+
+def is_up_to_date(tmx_map_path, compiled_path):
+    """
+    Checks whether a compiled level exists and was built from the current version of its Tiled map.
+
+    Parameters:
+    - tmx_map_path (str): The file path to the Tiled map file.
+    - compiled_path (str): The file path to the compiled level.
+
+    Returns:
+    - bool: True if the compiled level can be used as it is.
+    """
+
+    if not os.path.exists(compiled_path):
+        return False
+    if not os.path.exists(tmx_map_path):
+        return True
+
+    with open(compiled_path, "rb") as level_file:
+        header = level_file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return False
+
+    magic, version, *_, source_mtime = HEADER.unpack(header)
+    return magic == MAGIC and version == VERSION and source_mtime == os.path.getmtime(tmx_map_path)
+
+def load_level(tmx_map_path, convert=True):
+    """
+    Loads the compiled version of a Tiled map, compiling it first if it is missing or out of date.
+
+    Parameters:
+    - tmx_map_path (str): The file path to the Tiled map file.
+    - convert (bool): False to leave creating the tile images to CompiledLevel.convert_tiles().
+
+    Returns:
+    - CompiledLevel: The loaded level.
+    """
+
+    compiled_path = get_compiled_path(tmx_map_path)
+    if not is_up_to_date(tmx_map_path, compiled_path):
+        compile_level(tmx_map_path, compiled_path)
+    return CompiledLevel(compiled_path, convert)
+
+if __name__ == "__main__":
+    # Offline compile step: python level_compiler.py assets/levels/level-1.tmx
+    for path in sys.argv[1:]:
+        print(compile_level(path))
@@ -0,0 +1,236 @@
+import concurrent.futures
+import time
+from asset_cache import cache
+from level_compiler import load_level
+from map import Map
+
+# Share of a level's loading progress taken by the work on the worker thread
+DECODE_SHARE = 0.25
+
+# Tiles created or baked per main thread step, small enough to fit in a frame's time budget
+BATCH_SIZE = 32
+
+def close_level(future):
+    """
+    Unmaps the compiled level of a worker thread's finished part of loading, if it succeeded.
+
+    Parameters:
+    - future (concurrent.futures.Future): The worker thread's part of the loading.
+    """
+
+    if future.exception() is None:
+        level, _ = future.result()
+        level.close()
+
+class LevelLoad:
+    def __init__(self, path, future):
+        """
+        Initializes a LevelLoad that tracks one level while it is being loaded.
+
+        Parameters:
+        - path (str): The file path to the level's Tiled map file.
+        - future (concurrent.futures.Future): The worker thread's part of the loading, returning the decoded level and its image paths.
+        """
+
+        self.path = path
+        self.future = future
+        self.map = None
+        self.image_paths = []
+        self.steps = None
+        self.progress = 0.0
+        self.done = False
+
+class LevelManager:
+    def __init__(self, screen, level_paths, get_image_paths=None, render_mode="chunks"):
+        """
+        Initializes a LevelManager that holds the game's levels and loads them in the background.
+
+        A level is loaded in two parts. A worker thread compiles the Tiled map if needed, reads the compiled level and decodes
+        the images its spawn points use. The main thread then creates the surfaces, tile sprites and chunks a few at a time,
+        in update() between frames or in load() behind a loading screen.
+
+        Parameters:
+        - screen (pygame.Surface): The surface the maps are drawn on.
+        - level_paths (list): The file paths to the Tiled map files, in the order they are played.
+        - get_image_paths (function): Returns the image files used by a list of spawn points, decoded ahead of time. Called on the worker thread.
+        - render_mode (str): The render mode of the maps.
+        """
+
+        self.screen = screen
+        self.level_paths = list(level_paths)
+        self.get_image_paths = get_image_paths
+        self.render_mode = render_mode
+
+        self.loads = {}
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-loader")
+
+    def __len__(self):
+        return len(self.level_paths)
+
+    def prefetch(self, index):
+        """
+        Starts loading a level in the background, if it isn't loaded or loading already.
+
+        Parameters:
+        - index (int): The index of the level. Indices past the last level are ignored.
+        """
+
+        if 0 <= index < len(self.level_paths) and index not in self.loads:
+            path = self.level_paths[index]
+            self.loads[index] = LevelLoad(path, self.executor.submit(self.decode_level, path))
+
+    def decode_level(self, path):
+        """
+        The worker thread's part of loading a level: compiles the Tiled map if it changed, reads the compiled level and
+        decodes the spawn points' images. Nothing here may use the display, compiling only decodes the tileset images.
+
+        Parameters:
+        - path (str): The file path to the level's Tiled map file.
+
+        Returns:
+        - tuple: The CompiledLevel without its tile images, and the image paths of its spawn points.
+        """
+
+        level = load_level(path, convert=False)
+        image_paths = self.get_image_paths(level.spawns) if self.get_image_paths else []
+        for image_path in image_paths:
+            cache.decode_image(image_path)
+        return level, image_paths
+
+    def get_progress(self, index):
+        """
+        Returns how far a level has been loaded, e.g. for a loading screen.
+
+        Parameters:
+        - index (int): The index of the level.
+
+        Returns:
+        - float: 0 if the level hasn't been requested, 1 once it is ready to play.
+        """
+
+        level_load = self.loads.get(index)
+        return level_load.progress if level_load is not None else 0.0
+
+    def is_ready(self, index):
+        """
+        Checks whether a level is completely loaded.
+
+        Parameters:
+        - index (int): The index of the level.
+
+        Returns:
+        - bool: True if load() would return the level's map right away.
+        """
+
+        level_load = self.loads.get(index)
+        return level_load is not None and level_load.done
+
+    def update(self, time_budget=0.002):
+        """
+        Continues the main thread's part of the levels being loaded, for at most about time_budget seconds.
+        Call it once per frame while playing.
+
+        Parameters:
+        - time_budget (float): The time in seconds that may be spent this frame.
+        """
+
+        end_time = time.perf_counter() + time_budget
+        for level_load in self.loads.values():
+            while not level_load.done and level_load.future.done():
+                self.advance(level_load)
+                if time.perf_counter() >= end_time:
+                    return
+
+    def advance(self, level_load):
+        """
+        Runs the next main thread step of a level whose worker thread part has finished.
+
+        Parameters:
+        - level_load (LevelLoad): The level being loaded.
+        """
+
+        if level_load.steps is None:
+            # Raises here if the worker thread failed
+            level, level_load.image_paths = level_load.future.result()
+            level_load.map = Map(self.screen, level_load.path, self.render_mode, level=level, build=False)
+            level_load.steps = self.build_steps(level_load)
+            level_load.progress = DECODE_SHARE
+            return
+
+        progress = next(level_load.steps, None)
+        if progress is None:
+            level_load.progress = 1.0
+            level_load.done = True
+        else:
+            level_load.progress = DECODE_SHARE + progress * (1 - DECODE_SHARE)
+
+    def build_steps(self, level_load):
+        """
+        The main thread's part of loading a level: building the map and converting the decoded images.
+
+        Parameters:
+        - level_load (LevelLoad): The level being loaded.
+
+        Yields:
+        - float: The share of this part done so far, from 0 to 1.
+        """
+
+        # Converting the images is quick compared to building the map
+        for progress in level_load.map.build_steps(BATCH_SIZE):
+            yield progress * 0.9
+
+        for converted, image_path in enumerate(level_load.image_paths, 1):
+            cache.get_image(image_path)
+            yield 0.9 + converted / len(level_load.image_paths) * 0.1
+
+    def load(self, index, show_progress=None):
+        """
+        Returns the map of a level, finishing its loading first if needed.
+
+        Parameters:
+        - index (int): The index of the level.
+        - show_progress (function): Called with the progress while loading, e.g. to draw a loading screen. Not called if the level is ready.
+
+        Returns:
+        - Map: The level's map.
+        """
+
+        self.prefetch(index)
+        level_load = self.loads[index]
+
+        next_redraw = 0.0
+        while not level_load.done:
+            if level_load.future.done():
+                self.advance(level_load)
+            else:
+                # Wait for the worker thread a little at a time
+                concurrent.futures.wait([level_load.future], timeout=0.02)
+
+            # Redraw the progress at most 30 times per second, the steps are much shorter than a frame
+            if show_progress is not None and time.perf_counter() >= next_redraw:
+                show_progress(level_load.progress)
+                next_redraw = time.perf_counter() + 1 / 30
+
+        return level_load.map
+
+    def unload(self, index):
+        """
+        Forgets a loaded level, so its memory can be freed and its compiled file unmapped. It is loaded again when it's needed.
+
+        Parameters:
+        - index (int): The index of the level.
+        """
+
+        level_load = self.loads.pop(index, None)
+        if level_load is not None and not level_load.future.cancel():
+            # Closed right away if the worker thread is done, or as soon as it is
+            level_load.future.add_done_callback(close_level)
+
+    def close(self):
+        """
+        Unloads every level and stops the worker thread, cancelling the loads it hasn't started. Call it before quitting.
+        """
+
+        for index in list(self.loads):
+            self.unload(index)
+        self.executor.shutdown(cancel_futures=True)
@@ -1,60 +1,322 @@
 import pygame
-from pytmx import load_pygame
+from level_compiler import load_level
 
 class Map(pygame.sprite.Sprite):
-    def __init__(self, screen, tmx_map_path):
+    def __init__(self, screen, tmx_map_path, render_mode="chunks", chunk_size=512, level=None, build=True):
         """
         Initializes a Map object, loading a Tiled map from the specified file path.
 
+        The map is read from its compiled binary version, which is rebuilt whenever the Tiled map changes.
+
         Parameters:
         - screen (pygame.Surface): The surface where the map tiles will be drawn.
         - tmx_map_path (str): The file path to the Tiled map file.
+        - render_mode (str): "chunks" to draw pre-baked chunk surfaces, "sprites" to blit every tile sprite.
+        - chunk_size (int): The width and height in pixels of each baked chunk surface.
+        - level (CompiledLevel): An already loaded level to use instead of loading tmx_map_path.
+        - build (bool): False to leave creating the tiles and chunks to build_steps().
         """
 
         super().__init__()
         self.screen = screen
-        self.tmx_map = load_pygame(tmx_map_path)
-        self.block_size = self.tmx_map.tilewidth
+        self.level = level if level is not None else load_level(tmx_map_path)
+        self.block_size = self.level.tilewidth
+
+        # Size of the map in pixels
+        self.width = self.level.width * self.block_size
+        self.height = self.level.height * self.block_size
+
+        # Spawn points of items and enemies from the Tiled object layers
+        self.spawns = self.level.spawns
 
         # Create a sprite group for map tiles
         self.tiles_group = pygame.sprite.Group()
-        self.load_tiles()
+
+        # Spatial index of the tiles, keyed by (column, row) cell
+        self.tile_grid = {}
+
+        # Pre-baked surfaces of the static tile layers, keyed by (column, row) chunk
+        self.render_mode = render_mode
+        self.chunk_size = chunk_size
+        self.chunks = {}
+
+        if build:
+            for _ in self.build_steps():
+                pass
+
+    def build_steps(self, batch_size=256):
+        """
+        Creates the tile images, the tile sprites and the baked chunks a batch at a time, so the work can be spread over several frames.
+
+        Parameters:
+        - batch_size (int): The number of tiles to create or bake between two steps.
+
+        Yields:
+        - float: The share of the work done so far, from 0 to 1.
+        """
+
+        if self.level.tiles is None:
+            self.level.convert_tiles()
+            yield 0.0
+
+        # Creating the sprites and baking the chunks take about the same time
+        load_share = 0.5 if self.render_mode == "chunks" else 1.0
+
+        cell_count = sum(len(gids) for _, gids in self.level.layers)
+        for cells_done in self.load_tiles_steps(batch_size):
+            yield cells_done / cell_count * load_share
+
+        if self.render_mode == "chunks":
+            tile_count = len(self.tiles_group)
+            for tiles_done in self.bake_chunks_steps(batch_size):
+                yield load_share + tiles_done / tile_count * (1 - load_share)
+
+        yield 1.0
 
     def load_tiles(self):
         """
-        Loads map tiles from the Tiled map and creates sprite objects for each tile.
+        Loads map tiles from the compiled level and creates sprite objects for each tile.
 
         This method should be called during the initialization to populate the tiles_group.
         """
 
-        for layer in self.tmx_map.layers:
-            for x, y, gid, in layer:
-                tile = self.tmx_map.get_tile_image_by_gid(gid)
-                if tile:
+        for _ in self.load_tiles_steps():
+            pass
+
+    def load_tiles_steps(self, batch_size=256):
+        """
+        Creates the tile sprites like load_tiles(), pausing after every batch of tiles.
+
+        Parameters:
+        - batch_size (int): The number of tiles to create between two steps.
+
+        Yields:
+        - int: The number of map cells processed so far, counted over all layers.
+        """
+
+        tiles_created = 0
+        cells_done = 0
+        for name, gids in self.level.layers:
+            for index, gid in enumerate(gids):
+                if gid:
+                    tile = self.level.tiles[gid]
                     tile_sprite = pygame.sprite.Sprite()
                     tile_sprite.image = tile
                     tile_sprite.rect = tile.get_rect()
-                    tile_sprite.rect.x = x * self.block_size
-                    tile_sprite.rect.y = y * self.block_size
+                    tile_sprite.rect.x = index % self.level.width * self.block_size
+                    tile_sprite.rect.y = index // self.level.width * self.block_size
+                    tiles_created += 1
 
                     # Add the tile sprite to the tiles_group
                     self.tiles_group.add(tile_sprite)
+                    self.add_to_grid(tile_sprite)
+
+                    if tiles_created % batch_size == 0:
+                        yield cells_done + index + 1
+            cells_done += len(gids)
+            yield cells_done
 
-    def draw(self):
+    def add_to_grid(self, tile_sprite):
+        """
+        Registers a tile sprite in every grid cell that its rectangle overlaps.
+
+        Parameters:
+        - tile_sprite (pygame.sprite.Sprite): The tile sprite to index.
+        """
+
+        for cell in self.get_cells(tile_sprite.rect):
+            self.tile_grid.setdefault(cell, []).append(tile_sprite)
+
+    def get_cells(self, rect):
+        """
+        Returns the grid cells overlapped by a rectangle.
+
+        Parameters:
+        - rect (pygame.Rect): The rectangle in map coordinates.
+
+        Returns:
+        - list: The (column, row) cells covered by the rectangle.
+        """
+
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+
+        left = rect.left // self.block_size
+        top = rect.top // self.block_size
+        right = (rect.right - 1) // self.block_size
+        bottom = (rect.bottom - 1) // self.block_size
+        return [(x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)]
+
+    def bake_chunks(self):
+        """
+        Renders all map tiles onto chunk surfaces so a whole chunk can be drawn with a single blit.
+
+        Tiles are blitted in load order, so overlapping layers look the same as when drawing the tiles_group.
+        Chunks without any tiles are not created.
+        """
+
+        for _ in self.bake_chunks_steps():
+            pass
+
+    def bake_chunks_steps(self, batch_size=256):
+        """
+        Bakes the chunks like bake_chunks(), pausing after every batch of tiles.
+
+        Parameters:
+        - batch_size (int): The number of tiles to bake between two steps.
+
+        Yields:
+        - int: The number of tiles baked so far.
+        """
+
+        self.chunks = {}
+        for tiles_done, tile in enumerate(self.tiles_group, 1):
+            left = tile.rect.left // self.chunk_size
+            top = tile.rect.top // self.chunk_size
+            right = (tile.rect.right - 1) // self.chunk_size
+            bottom = (tile.rect.bottom - 1) // self.chunk_size
+
+            # A tile can straddle the border of up to four chunks
+            for chunk_y in range(top, bottom + 1):
+                for chunk_x in range(left, right + 1):
+                    chunk = self.chunks.get((chunk_x, chunk_y))
+                    if chunk is None:
+                        chunk = pygame.Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA).convert_alpha()
+                        chunk.fill((0, 0, 0, 0))
+                        self.chunks[(chunk_x, chunk_y)] = chunk
+                    chunk.blit(tile.image, (tile.rect.x - chunk_x * self.chunk_size, tile.rect.y - chunk_y * self.chunk_size))
+
+            if tiles_done % batch_size == 0:
+                yield tiles_done
+
+    def draw(self, camera=None, surface=None):
         """
         Draws the map tiles on the specified screen.
+
+        Parameters:
+        - camera (Camera): The camera object for transforming the tiles' positions. Without a camera the tiles are drawn at their map positions.
+        - surface (pygame.Surface): The surface to draw on instead of the screen, e.g. a lower resolution render target.
+        """
+
+        if surface is None:
+            surface = self.screen
+
+        if camera is None:
+            # Draw the tiles from the tiles_group
+            self.tiles_group.draw(surface)
+        elif self.render_mode == "chunks":
+            self.draw_chunks(camera, surface)
+        else:
+            for tile in self.tiles_group:
+                surface.blit(tile.image, camera.apply(tile))
+
+    def draw_chunks(self, camera, surface=None):
+        """
+        Draws only the baked chunks that intersect the camera's view of the screen.
+
+        Parameters:
+        - camera (Camera): The camera object for transforming the chunks' positions.
+        - surface (pygame.Surface): The surface to draw on instead of the screen.
+        """
+
+        if surface is None:
+            surface = self.screen
+
+        offset_x, offset_y = camera.camera.topleft
+        view_width, view_height = surface.get_size()
+
+        # The area of the map currently visible on the screen
+        left = -offset_x // self.chunk_size
+        top = -offset_y // self.chunk_size
+        right = (-offset_x + view_width - 1) // self.chunk_size
+        bottom = (-offset_y + view_height - 1) // self.chunk_size
+
+        for chunk_y in range(top, bottom + 1):
+            for chunk_x in range(left, right + 1):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk is not None:
+                    surface.blit(chunk, (chunk_x * self.chunk_size + offset_x, chunk_y * self.chunk_size + offset_y))
+
+    def get_nearby_tiles(self, rect):
         """
-        
-        # Draw the tiles from the tiles_group
-        self.tiles_group.draw(self.screen)
+        Retrieves the tile sprites in the grid cells that a rectangle overlaps. These are only candidates, they may not touch it.
+
+        Parameters:
+        - rect (pygame.Rect): The rectangle in map coordinates.
 
-    def get_colliding_tiles(self, player_rect):
+        Returns:
+        - The candidate tile sprites, each listed once.
         """
-        Retrieves a list of tile sprites that collide with the provided player_rect.
+
+        cells = self.get_cells(rect)
+        if len(cells) == 1:
+            return self.tile_grid.get(cells[0], [])
+
+        candidates = set()
+        for cell in cells:
+            candidates.update(self.tile_grid.get(cell, ()))
+        return candidates
+
+    def sweep_rect(self, rect, dx, dy):
+        """
+        Moves a rectangle by dx and then dy, stopping it against the first tile in its way on each axis.
+
+        All tiles along the path are found with a single grid query, so fast movement can't skip over thin tiles.
+        Tiles the rectangle already overlaps don't block its horizontal motion, and push it out on top while it falls or below while it rises.
 
         Parameters:
-        - player_rect (pygame.Rect): The rectangle representing the player's position and dimensions.
+        - rect (pygame.Rect): The rectangle to move, changed in place.
+        - dx (int): The horizontal distance to move.
+        - dy (int): The vertical distance to move.
+
+        Returns:
+        - Contacts: Which sides of the rectangle were stopped by a tile.
+        """
+
+        contacts = Contacts()
+        tile_rects = [tile.rect for tile in self.get_nearby_tiles(rect.union(rect.move(dx, dy)))]
+
+        # Horizontal motion, against the tiles level with the rectangle
+        if dx:
+            for tile_rect in tile_rects:
+                if tile_rect.top < rect.bottom and tile_rect.bottom > rect.top:
+                    if dx > 0 and tile_rect.left >= rect.right and tile_rect.left - rect.right < dx:
+                        dx = tile_rect.left - rect.right
+                        contacts.wall = True
+                    elif dx < 0 and tile_rect.right <= rect.left and tile_rect.right - rect.left > dx:
+                        dx = tile_rect.right - rect.left
+                        contacts.wall = True
+            rect.x += dx
+
+        # Vertical motion, against the tiles below or above the rectangle at its new position
+        if dy:
+            # Pushing the rectangle out of a tile can reverse dy, so keep the direction it was moving in
+            falling = dy > 0
+            for tile_rect in tile_rects:
+                if tile_rect.left < rect.right and tile_rect.right > rect.left:
+                    if falling and tile_rect.bottom > rect.top and tile_rect.top - rect.bottom < dy:
+                        dy = tile_rect.top - rect.bottom
+                        contacts.grounded = True
+                    elif not falling and tile_rect.top < rect.bottom and tile_rect.bottom - rect.top > dy:
+                        dy = tile_rect.bottom - rect.top
+                        contacts.ceiling = True
+            rect.y += dy
+
+        return contacts
+
+class Contacts:
+    __slots__ = ("grounded", "ceiling", "wall")
+
+    def __init__(self):
+        """
+        Initializes a Contacts object, the sides of a moving rectangle that were stopped by a tile.
+
+        Attributes:
+        - grounded (bool): Stopped while moving down, standing on a tile.
+        - ceiling (bool): Stopped while moving up, bumping into a tile.
+        - wall (bool): Stopped while moving sideways.
         """
 
-        # Return a list of tile sprites that collide with the player_rect
-        return [tile for tile in self.tiles_group if tile.rect.colliderect(player_rect)]
\ No newline at end of file
+        self.grounded = False
+        self.ceiling = False
+        self.wall = False
\ No newline at end of file
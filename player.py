@@ -1,47 +1,63 @@
 import pygame
 import os
+from asset_cache import cache
+from animation import animations
+from map import Contacts
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, screen, camera):
+    def __init__(self, screen, camera, native_size=False):
         """
         Initializes a Player object.
 
         Parameters:
         - screen (pygame.Surface): The surface where the player will be drawn.
         - camera (Camera): The camera object for transforming the player's position.
+        - native_size (bool): True to keep the frames at the size they are drawn in, for a world that is upscaled as a whole.
         """
 
         super().__init__()
         self.screen = screen
         self.camera = camera
 
-        # Load player animation frames for different states
+        # Load the scaled player animation frames for different states from the shared asset cache
         self.parent_path = "assets/player/"
-        self.idle_frames = [pygame.image.load(os.path.join(self.parent_path, f"player-idle{i}.png")).convert_alpha() for i in range(1, 7)]
-        self.jump_frames = [pygame.image.load(os.path.join(self.parent_path, f"player-jump{i}.png")).convert_alpha() for i in range(1, 3)]
-        self.run_frames = [pygame.image.load(os.path.join(self.parent_path, f"player-run{i}.png")).convert_alpha() for i in range(1, 7)]
+        self.scale_factor = None if native_size else 1.5
+        name = "player-native" if native_size else "player"
+        idle_paths = [os.path.join(self.parent_path, f"player-idle{i}.png") for i in range(1, 7)]
+        jump_paths = [os.path.join(self.parent_path, f"player-jump{i}.png") for i in range(1, 3)]
+        run_paths = [os.path.join(self.parent_path, f"player-run{i}.png") for i in range(1, 7)]
 
-        # Scaling player
-        self.scale_factor = 1.5
-        self.idle_frames = [pygame.transform.scale(frame, (frame.get_width() * self.scale_factor, frame.get_height() * self.scale_factor)) for frame in self.idle_frames]
-        self.jump_frames = [pygame.transform.scale(frame, (frame.get_width() * self.scale_factor, frame.get_height() * self.scale_factor)) for frame in self.jump_frames]
-        self.run_frames = [pygame.transform.scale(frame, (frame.get_width() * self.scale_factor, frame.get_height() * self.scale_factor)) for frame in self.run_frames]
+        self.idle_frames = animations.get_frames(f"{name}-idle", lambda: [cache.get_image(path, self.scale_factor) for path in idle_paths])
+        self.jump_frames = animations.get_frames(f"{name}-jump", lambda: [cache.get_image(path, self.scale_factor) for path in jump_paths])
+        self.run_frames = animations.get_frames(f"{name}-run", lambda: [cache.get_image(path, self.scale_factor) for path in run_paths])
 
         # Facing left
-        self.idle_frames_left = [pygame.transform.flip(frame, True, False) for frame in self.idle_frames]
-        self.jump_frames_left = [pygame.transform.flip(frame, True, False) for frame in self.jump_frames]
-        self.run_frames_left = [pygame.transform.flip(frame, True, False) for frame in self.run_frames]
+        self.idle_frames_left = animations.get_frames(f"{name}-idle-left", lambda: [cache.get_image(path, self.scale_factor, flip=True) for path in idle_paths])
+        self.jump_frames_left = animations.get_frames(f"{name}-jump-left", lambda: [cache.get_image(path, self.scale_factor, flip=True) for path in jump_paths])
+        self.run_frames_left = animations.get_frames(f"{name}-run-left", lambda: [cache.get_image(path, self.scale_factor, flip=True) for path in run_paths])
+
+        # Frame table for each player state
+        self.state_frames = {
+            "idle-right": self.idle_frames,
+            "idle-left": self.idle_frames_left,
+            "jump-right": self.jump_frames,
+            "jump-left": self.jump_frames_left,
+            "run-right": self.run_frames,
+            "run-left": self.run_frames_left
+        }
+        self.frames = self.idle_frames
 
         self.frame_index = 0
         self.image = self.idle_frames[self.frame_index]
 
         self.rect = self.image.get_rect()
         self.rect.center = (screen.get_width() // 2, screen.get_height() // 2)
+        self.previous_position = self.rect.topleft
         self.screen_rect = screen.get_rect()
 
-        # Animation settings
+        # Animation settings, the frames are advanced by the shared animation system
         self.animation_speed = 0.2
-        self.animation_timer = pygame.time.get_ticks()
+        self.animation_timer = animations.time
 
         # Player movement speed
         self.speed = 5
@@ -54,12 +70,17 @@ class Player(pygame.sprite.Sprite):
         self.y_velocity = 0
         self.jump_count = 1
 
+        # Horizontal distance to move in the next update, and the tiles the last update ran into
+        self.move_x = 0
+        self.contacts = Contacts()
+
         # Health
         self.max_health = 100
         self.health = self.max_health
 
         # Score
         self.score = 0
+        self.items_collected = 0
 
     def update(self, map_instance):
         """
@@ -69,23 +90,18 @@ class Player(pygame.sprite.Sprite):
         - map_instance (Map): The map instance associated with the player.
         """
 
-        # Gravity
+        # Gravity, applied once per simulation step
         self.y_velocity += 1
-        self.rect.y += self.y_velocity
-        self.map = map_instance
-
-        # Check for collisions with map tiles
-        colliding_tiles = self.map.get_colliding_tiles(self.rect)
-
-        # Adjust the player's position based on collisions
-        for tile in colliding_tiles:
-            if self.y_velocity > 0:
-                self.rect.bottom = tile.rect.top
-                self.y_velocity = 0
-                self.jump_count = 1 
-            elif self.y_velocity < 0:
-                self.rect.top = tile.rect.bottom - 1
-                self.y_velocity = 0
+
+        # Move along x and then y in one sweep against the nearby map tiles
+        self.contacts = map_instance.sweep_rect(self.rect, self.move_x, self.y_velocity)
+        self.move_x = 0
+
+        if self.contacts.grounded:
+            self.y_velocity = 0
+            self.jump_count = 1
+        elif self.contacts.ceiling:
+            self.y_velocity = 0
 
         # Prevent player from falling below the screen
         if self.rect.bottom > 1728:
@@ -93,39 +109,37 @@ class Player(pygame.sprite.Sprite):
             self.y_velocity = 0
             self.jump_count = 1
 
-        # Update animation frame
-        current_time = pygame.time.get_ticks()
-        if current_time - self.animation_timer > self.animation_speed * 1000:
-            self.animation_timer = current_time
-            self.frame_index = (self.frame_index + 1) % len(self.get_current_frames())
-            self.image = self.get_current_frames()[self.frame_index]
+        # Play the frames of the current state
+        self.frames = self.get_current_frames()
 
     # Player movements
-    def move(self):
+    def move(self, keys=None):
         """
         Handles player movements based on keyboard input.
 
         The player can move left, right, and jump using the arrow keys or spacebar.
+        The movement is applied against the map tiles in the next update().
+
+        Parameters:
+        - keys: The pressed keys, indexable by pygame key constants. Defaults to pygame.key.get_pressed().
         """
 
-        keys = pygame.key.get_pressed()
+        # Remember where the step started so rendering can interpolate between steps
+        self.previous_position = self.rect.topleft
+
+        if keys is None:
+            keys = pygame.key.get_pressed()
 
         if keys[pygame.K_LEFT] and self.rect.left > 0:
             self.player_direction = "left"
             self.state = "run-left"
+            self.move_x -= self.speed
 
-            # Check for collisions with map tiles in the x-direction
-            if not self.check_wall_collision(-self.speed):
-                self.rect.x -= self.speed
-                    
         elif keys[pygame.K_RIGHT] and self.rect.right < 2048:
             self.player_direction = "right"
             self.state = "run-right"
+            self.move_x += self.speed
 
-            # Check for collisions with map tiles in the x-direction
-            if not self.check_wall_collision(self.speed):
-                self.rect.x += self.speed
-            
         else:
             if self.player_direction == "right":
                 self.state = "idle-right"
@@ -143,48 +157,52 @@ class Player(pygame.sprite.Sprite):
             self.jump_count -= 1
             self.frame_index = 0
 
-            if keys[pygame.K_LEFT] and not self.check_wall_collision(-self.speed) and self.rect.left > 0:
-                self.rect.x -= self.speed
-            elif keys[pygame.K_RIGHT] and not self.check_wall_collision(self.speed) and self.rect.right < 2048:
-                self.rect.x += self.speed
+            if keys[pygame.K_LEFT] and self.rect.left > 0:
+                self.move_x -= self.speed
+            elif keys[pygame.K_RIGHT] and self.rect.right < 2048:
+                self.move_x += self.speed
 
     def get_current_frames(self):
         """
         Returns the current set of frames based on the player's state and direction.
 
         Returns:
-        - list: The list of frames for the current player state and direction.
+        - tuple: The frame table for the current player state and direction.
         """
 
-        frame_dict = {
-            "idle-right": self.idle_frames,
-            "idle-left": self.idle_frames_left,
-            "jump-right": self.jump_frames,
-            "jump-left": self.jump_frames_left,
-            "run-right": self.run_frames,
-            "run-left": self.run_frames_left
-        }
+        return self.state_frames.get(self.state, self.idle_frames)  # Default to idle frames if state is not found
 
-        return frame_dict.get(self.state, self.idle_frames)  # Default to idle frames if state is not found
 
-        
-    def draw(self):
-        self.screen.blit(self.image, self.rect)
-    
-    def check_wall_collision(self, x_offset):
+    def get_render_rect(self, alpha=1.0):
         """
-        Checks for collisions with map tiles in the x-direction.
+        Returns the player's rectangle interpolated between the previous and the current simulation step.
 
         Parameters:
-        - x_offset (int): The amount to offset the player's position in the x-direction.
+        - alpha (float): 0 for the previous step's position, 1 for the current position.
 
         Returns:
-        - bool: True if a collision is detected, False otherwise.
+        - pygame.Rect: The rectangle to draw the player at.
         """
-         
-        temp_rect = self.rect.copy()
-        temp_rect.x += x_offset
-        return any(tile.rect.colliderect(temp_rect) for tile in self.map.get_colliding_tiles(temp_rect))
+
+        if alpha >= 1.0:
+            return self.rect
+
+        previous_x, previous_y = self.previous_position
+        x = round(previous_x + (self.rect.x - previous_x) * alpha)
+        y = round(previous_y + (self.rect.y - previous_y) * alpha)
+        return self.rect.move(x - self.rect.x, y - self.rect.y)
+
+    def draw(self):
+        self.screen.blit(self.image, self.rect)
+
+    @property
+    def mask(self):
+        """
+        The collision mask of the current frame, used by pygame.sprite.collide_mask().
+        Masks are created once per frame and shared through the asset cache.
+        """
+
+        return cache.get_mask(self.image)
     
     def hit(self):
         """
@@ -195,6 +213,45 @@ class Player(pygame.sprite.Sprite):
         # print("Oh i got Hit") # For debugging purpose
         # print(self.health) # For debugging purpose
 
+    def snapshot(self):
+        """
+        Captures the player's state so it can be restored when the level is replayed.
+
+        Returns:
+        - dict: The player's state.
+        """
+
+        return {
+            "rect": self.rect.copy(),
+            "frames": self.frames,
+            "frame_index": self.frame_index,
+            "image": self.image,
+            "state": self.state,
+            "player_direction": self.player_direction,
+            "y_velocity": self.y_velocity,
+            "jump_count": self.jump_count,
+            "speed": self.speed,
+            "jump_speed": self.jump_speed,
+            "health": self.health,
+            "score": self.score,
+            "items_collected": self.items_collected,
+        }
+
+    def restore(self, snapshot):
+        """
+        Restores the player's state from a snapshot.
+
+        Parameters:
+        - snapshot (dict): A state returned by snapshot().
+        """
+
+        for name, value in snapshot.items():
+            setattr(self, name, value)
+
+        self.rect = snapshot["rect"].copy()
+        self.previous_position = self.rect.topleft
+        self.animation_timer = animations.time
+
     def change_speed_x(self, amount):
         self.speed = amount
 
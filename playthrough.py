@@ -0,0 +1,294 @@
+import os
+
+# Render without a window. This has to be set before pygame initializes its display.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Keep stdout clean for the JSON report
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+import pygame
+from animation import animations
+from benchmark import HeadlessWorldOfMagic, ScriptedInput
+from level_compiler import compile_level, get_compiled_path, is_up_to_date
+from profiler import percentile
+from WorldOfMagic import SIM_RATE, LEVEL_PATH, PROFIT_QUOTA
+
+# Key combinations a random bot picks from, held for a random number of steps
+RANDOM_ACTIONS = [
+    [],
+    ["RIGHT"],
+    ["LEFT"],
+    ["RIGHT", "SPACE"],
+    ["LEFT", "SPACE"],
+    ["SPACE"],
+]
+
+MAX_STEPS = 3 * 60 * SIM_RATE # Three minutes of play
+HEATMAP_CELL_SIZE = 128
+
+# The game each worker process reuses for all of its playthroughs
+worker_game = None
+
+class BotWorldOfMagic(HeadlessWorldOfMagic):
+    def __init__(self):
+        """
+        Initializes a game that is only simulated, never drawn, for bot playthroughs.
+
+        The game runs on a simulated clock, so cooldowns and animations behave the same however fast the steps are run.
+        """
+
+        super().__init__()
+        self.step_count = 0
+        self.pickups = []
+
+    def step(self, keys=None):
+        super().step(keys)
+        self.step_count += 1
+
+        # Nothing is rendered, but the camera still decides which spawn regions are active
+        self.camera.follow(self.player.rect, *self.render_target.get_size())
+
+    def update_animations(self):
+        animations.tick(self.step_count * 1000 // SIM_RATE)
+        animations.update((self.player,))
+        animations.update(self.enemies)
+
+    def update_collisions(self):
+        # Items that are gone after the contacts were handled have been picked up
+        touching = [entity for entity in self.broadphase.query(self.player.rect) if self.items.has(entity)]
+        super().update_collisions()
+        for item in touching:
+            if not item.alive():
+                self.pickups.append((item.rect.x, item.rect.y))
+
+    def reset(self):
+        self.step_count = 0
+        animations.tick(0)
+        super().reset()
+        self.results = []
+        self.pickups = []
+
+def random_script(rng, steps):
+    """
+    Creates a random input script.
+
+    Parameters:
+    - rng (random.Random): The random number generator to use.
+    - steps (int): The minimum number of steps the script has to cover.
+
+    Returns:
+    - list: A list of (frames, key names) pairs.
+    """
+
+    # Let the player land before pressing anything
+    script = [(30, [])]
+    total = 30
+    while total < steps:
+        frames = rng.randint(10, 90)
+        script.append((frames, rng.choice(RANDOM_ACTIONS)))
+        total += frames
+    return script
+
+def run_playthrough(game, seed, script=None, max_steps=MAX_STEPS):
+    """
+    Plays the level once from the start until the victory screen, the player's death, or the step limit.
+
+    Parameters:
+    - game (BotWorldOfMagic): The game to play, reset before the run.
+    - seed (int): The seed of the random input, used when there is no script.
+    - script (list): A list of (frames, key names) pairs to replay instead of random input.
+    - max_steps (int): The maximum number of simulation steps.
+
+    Returns:
+    - dict: The outcome of the playthrough.
+    """
+
+    game.reset()
+    player = game.player
+    start_health = player.health
+    keys = ScriptedInput(script or random_script(random.Random(seed), max_steps))
+
+    quota_step = None
+    for step in range(max_steps):
+        game.step(keys.get_pressed(step))
+
+        if quota_step is None and player.score >= PROFIT_QUOTA:
+            quota_step = game.step_count
+        if game.results or player.health <= 0:
+            break
+
+    return {
+        "seed": seed,
+        "steps": game.step_count,
+        "score": player.score,
+        "finished": bool(game.results),
+        "victory": bool(game.results) and game.results[0]["victory"],
+        "died": player.health <= 0,
+        "quota_step": quota_step,
+        "damage": start_health - player.health,
+        "pickups": game.pickups,
+    }
+
+def init_worker():
+    global worker_game
+    worker_game = BotWorldOfMagic()
+
+def run_worker(task):
+    seed, script, max_steps = task
+    return run_playthrough(worker_game, seed, script, max_steps)
+
+def prepare_level():
+    """
+    Compiles the level once up front, so the worker processes don't all compile it at the same time.
+    """
+
+    if not is_up_to_date(LEVEL_PATH, get_compiled_path(LEVEL_PATH)):
+        compile_level(LEVEL_PATH)
+
+def run_batch(runs, processes, seed=0, script=None, max_steps=MAX_STEPS):
+    """
+    Runs many playthroughs spread over a pool of worker processes.
+
+    Parameters:
+    - runs (int): The number of playthroughs.
+    - processes (int): The number of worker processes. 1 runs everything in this process.
+    - seed (int): The seed of the first playthrough, the others count up from it.
+    - script (list): A list of (frames, key names) pairs to replay instead of random input.
+    - max_steps (int): The maximum number of simulation steps per playthrough.
+
+    Returns:
+    - list: The outcome of every playthrough, ordered by seed.
+    """
+
+    tasks = [(seed + run, script, max_steps) for run in range(runs)]
+
+    if processes == 1:
+        init_worker()
+        return [run_worker(task) for task in tasks]
+
+    prepare_level()
+    # Hand out tasks in chunks, but small enough that every worker stays busy until the end
+    chunk_size = max(1, runs // (processes * 8))
+    # Start fresh worker processes, a forked copy of an initialized SDL display can hang
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes, initializer=init_worker) as pool:
+        results = list(pool.imap_unordered(run_worker, tasks, chunk_size))
+
+        # Let the workers shut pygame down themselves, terminating them can leave the pool waiting forever
+        pool.close()
+        pool.join()
+    return sorted(results, key=lambda result: result["seed"])
+
+def summarize(values):
+    """
+    Summarizes a list of numbers.
+
+    Parameters:
+    - values (list): The numbers.
+
+    Returns:
+    - dict: The mean, median, 90th percentile and maximum.
+    """
+
+    if not values:
+        return {}
+
+    ordered = sorted(values)
+    return {
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "p50": ordered[len(ordered) // 2],
+        "p90": percentile(ordered, 0.9),
+        "max": ordered[-1],
+    }
+
+def report(results, elapsed, processes):
+    """
+    Aggregates the playthroughs.
+
+    Parameters:
+    - results (list): The outcomes returned by run_playthrough().
+    - elapsed (float): The wall clock time of the batch in seconds.
+    - processes (int): The number of worker processes used.
+
+    Returns:
+    - dict: The aggregated results, ready to be written as JSON.
+    """
+
+    runs = len(results)
+    total_steps = sum(result["steps"] for result in results)
+
+    # How often the items in each cell of the map were picked up, per playthrough
+    heatmap = {}
+    for result in results:
+        for x, y in result["pickups"]:
+            cell = f"{x // HEATMAP_CELL_SIZE},{y // HEATMAP_CELL_SIZE}"
+            heatmap[cell] = heatmap.get(cell, 0) + 1
+
+    return {
+        "runs": runs,
+        "processes": processes,
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_s": round(runs / elapsed, 1) if elapsed else 0,
+        "steps_per_s": round(total_steps / elapsed) if elapsed else 0,
+        "completion_rate": round(sum(result["victory"] for result in results) / runs, 4),
+        "finish_rate": round(sum(result["finished"] for result in results) / runs, 4),
+        "death_rate": round(sum(result["died"] for result in results) / runs, 4),
+        "time_to_quota_s": summarize([result["quota_step"] / SIM_RATE for result in results if result["quota_step"] is not None]),
+        "score": summarize([result["score"] for result in results]),
+        "damage": summarize([result["damage"] for result in results]),
+        "pickup_heatmap": {
+            "cell_size": HEATMAP_CELL_SIZE,
+            "cells": {cell: round(count / runs, 4) for cell, count in sorted(heatmap.items())},
+        },
+    }
+
+def positive_int(text):
+    """
+    Parses a command line count that must be at least 1.
+
+    Parameters:
+    - text (str): The argument.
+
+    Returns:
+    - int: The count.
+    """
+
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate bot playthroughs of World Of Magic and report level statistics as JSON.")
+    parser.add_argument("--runs", type=positive_int, default=1000, help="number of playthroughs")
+    parser.add_argument("--processes", type=positive_int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first random playthrough")
+    parser.add_argument("--max-steps", type=positive_int, default=MAX_STEPS, help="step limit of each playthrough")
+    parser.add_argument("--script", help="JSON file with a list of [frames, [key names]] input steps instead of random input")
+    parser.add_argument("--output", help="file to write the JSON report to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script) as script_file:
+            script = json.load(script_file)
+
+    start_time = time.perf_counter()
+    results = run_batch(args.runs, args.processes, args.seed, script, args.max_steps)
+    output = json.dumps(report(results, time.perf_counter() - start_time, args.processes), indent=2)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,341 @@
+import array
+import cProfile
+import collections
+import gc
+import sys
+import time
+import tracemalloc
+from asset_cache import cache
+
+class NullScope:
+    """
+    A timing scope that does nothing, used while the profiler is disabled.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+class TimingScope:
+    def __init__(self, profiler, name, index):
+        """
+        Initializes a TimingScope that adds the time spent inside a with-block to a named phase of the current frame.
+
+        Parameters:
+        - profiler (FrameProfiler): The profiler collecting the timings.
+        - name (str): The name of the phase.
+        - index (int): The phase's slot in the profiler's current_phase_times.
+        """
+
+        self.profiler = profiler
+        self.name = name
+        self.index = index
+        self.start_time = 0.0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        phase_times = self.profiler.current_phase_times
+        duration = time.perf_counter() - self.start_time
+        if phase_times[self.index] < 0:
+            phase_times[self.index] = duration
+        else:
+            phase_times[self.index] += duration
+        return False
+
+NULL_SCOPE = NullScope()
+
+# Upper bounds in seconds of the frame time histogram buckets: 60 FPS, 30 FPS and 15 FPS. Slower frames go in a last bucket.
+HITCH_BOUNDS = (1 / 60, 1 / 30, 1 / 15)
+
+def percentile(sorted_samples, fraction):
+    """
+    Returns the sample at the given fraction of a sorted list.
+
+    Parameters:
+    - sorted_samples (list): The samples in ascending order.
+    - fraction (float): A value between 0 and 1, e.g. 0.99 for the 99th percentile.
+
+    Returns:
+    - float: The sample at that position.
+    """
+
+    index = min(int(fraction * len(sorted_samples)), len(sorted_samples) - 1)
+    return sorted_samples[index]
+
+class FrameProfiler:
+    def __init__(self, history=300):
+        """
+        Initializes a FrameProfiler that times named phases of each frame and keeps the last frames in a ring buffer.
+
+        While it is disabled, scope() returns a shared scope that does nothing, so the game loop pays almost nothing for it.
+
+        Parameters:
+        - history (int): The number of frames to keep samples for.
+        """
+
+        self.enabled = False
+        self.overlay_visible = False
+        self.history = history
+        self.frame_times = collections.deque(maxlen=history)
+        self.phase_times = {}
+        self.scopes = {}
+
+        # This frame's time of each phase by slot, -1 for phases that haven't run. Reset in place every frame,
+        # so timing the phases doesn't allocate anything that would show up in the allocation counts.
+        self.phase_names = []
+        self.current_phase_times = array.array("d")
+        self.no_phase_times = array.array("d")
+        self.frame_start = 0.0
+
+        # cProfile capture of a number of frames
+        self.cprofile = None
+        self.cprofile_frames = 0
+        self.cprofile_path = None
+        # The file of the last finished capture, shown in the overlay
+        self.cprofile_written = None
+
+        self.overlay_lines = []
+        self.frames_since_overlay = 0
+
+        # Allocation tracking, per frame: the change in allocated memory blocks, the bytes allocated at the peak
+        # and the time spent in garbage collections
+        self.tracking_allocations = False
+        self.allocated_blocks = collections.deque(maxlen=history)
+        self.allocated_bytes = collections.deque(maxlen=history)
+        self.gc_pauses = collections.deque(maxlen=history)
+        # Holds the block count at the start of the frame. Stored in an array, a new int object would be counted itself.
+        self.frame_blocks = array.array("q", [0])
+        self.frame_memory = 0
+        self.frame_gc_pause = 0.0
+        self.gc_start = 0.0
+        self.gc_collections = 0
+
+    def scope(self, name):
+        """
+        Returns a context manager that times a phase of the current frame.
+
+        Parameters:
+        - name (str): The name of the phase.
+
+        Returns:
+        - A context manager for a with-statement.
+        """
+
+        if not self.enabled:
+            return NULL_SCOPE
+
+        timing_scope = self.scopes.get(name)
+        if timing_scope is None:
+            timing_scope = TimingScope(self, name, len(self.phase_names))
+            self.scopes[name] = timing_scope
+            self.phase_names.append(name)
+            self.current_phase_times.append(-1.0)
+            self.no_phase_times.append(-1.0)
+        return timing_scope
+
+    def begin_frame(self):
+        """
+        Marks the start of a frame.
+        """
+
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+            self.current_phase_times[:] = self.no_phase_times
+
+            if self.tracking_allocations:
+                self.frame_gc_pause = 0.0
+                self.frame_blocks[0] = sys.getallocatedblocks()
+                tracemalloc.reset_peak()
+                self.frame_memory = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        """
+        Marks the end of a frame, storing its timings and stopping a finished cProfile capture.
+        """
+
+        if not self.enabled:
+            return
+
+        # Read the allocation counters before this method allocates anything itself
+        if self.tracking_allocations:
+            allocated_blocks = sys.getallocatedblocks() - self.frame_blocks[0]
+            allocated_bytes = tracemalloc.get_traced_memory()[1] - self.frame_memory
+            self.allocated_blocks.append(allocated_blocks)
+            self.allocated_bytes.append(allocated_bytes)
+            self.gc_pauses.append(self.frame_gc_pause)
+
+        self.frame_times.append(time.perf_counter() - self.frame_start)
+        for name, duration in zip(self.phase_names, self.current_phase_times):
+            if duration < 0:
+                continue
+            samples = self.phase_times.get(name)
+            if samples is None:
+                samples = collections.deque(maxlen=self.history)
+                self.phase_times[name] = samples
+            samples.append(duration)
+
+        if self.cprofile is not None:
+            self.cprofile_frames -= 1
+            if self.cprofile_frames <= 0:
+                self.stop_cprofile()
+
+    def set_overlay(self, visible):
+        """
+        Shows or hides the performance overlay. Timing is only enabled while something needs it.
+
+        Parameters:
+        - visible (bool): True to show the overlay.
+        """
+
+        self.overlay_visible = visible
+        self.frames_since_overlay = 0
+        self.update_enabled()
+
+    def update_enabled(self):
+        """
+        Enables timing while the overlay, a cProfile capture or allocation tracking needs it.
+        """
+
+        self.enabled = self.overlay_visible or self.cprofile is not None or self.tracking_allocations
+
+    def track_allocations(self, enabled):
+        """
+        Starts or stops counting the memory allocated and the garbage collection time of every frame.
+
+        Tracing with tracemalloc makes the whole game noticeably slower, so it is only used while tracking.
+
+        Parameters:
+        - enabled (bool): True to start tracking.
+        """
+
+        if enabled == self.tracking_allocations:
+            return
+
+        self.tracking_allocations = enabled
+        if enabled:
+            tracemalloc.start()
+            gc.callbacks.append(self.on_gc)
+        else:
+            gc.callbacks.remove(self.on_gc)
+            tracemalloc.stop()
+        self.update_enabled()
+
+    def on_gc(self, phase, info):
+        """
+        Times a garbage collection, called by Python before and after each one.
+
+        Parameters:
+        - phase (str): "start" or "stop".
+        - info (dict): Details about the collection, e.g. its generation.
+        """
+
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        else:
+            self.frame_gc_pause += time.perf_counter() - self.gc_start
+            self.gc_collections += 1
+
+    def start_cprofile(self, frames, path):
+        """
+        Runs cProfile for a number of frames and then writes its stats to a file.
+
+        Parameters:
+        - frames (int): The number of frames to profile.
+        - path (str): The file to write the stats to, readable with pstats.
+        """
+
+        if self.cprofile is not None:
+            return
+
+        self.cprofile = cProfile.Profile()
+        self.cprofile_frames = frames
+        self.cprofile_path = path
+        self.enabled = True
+        self.cprofile.enable()
+
+    def stop_cprofile(self):
+        """
+        Stops a running cProfile capture and writes its stats. The overlay shows where they were written.
+        """
+
+        self.cprofile.disable()
+        self.cprofile.dump_stats(self.cprofile_path)
+        self.cprofile_written = self.cprofile_path
+
+        self.cprofile = None
+        self.update_enabled()
+
+    def get_phase_means(self):
+        """
+        Returns the average time of each phase over the recorded frames.
+
+        Returns:
+        - list: (name, seconds) pairs, slowest first.
+        """
+
+        means = [(name, sum(samples) / len(samples)) for name, samples in self.phase_times.items() if samples]
+        return sorted(means, key=lambda mean: mean[1], reverse=True)
+
+    def get_hitch_histogram(self):
+        """
+        Counts the recorded frames by how long they took, using the HITCH_BOUNDS buckets.
+
+        Returns:
+        - dict: The number of frames per bucket, e.g. {"<16.7ms": 290, "16.7-33.3ms": 8, ...}, fastest first.
+        """
+
+        counts = [0] * (len(HITCH_BOUNDS) + 1)
+        for frame_time in self.frame_times:
+            bucket = 0
+            while bucket < len(HITCH_BOUNDS) and frame_time >= HITCH_BOUNDS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+
+        bounds = [f"{bound * 1000:.1f}" for bound in HITCH_BOUNDS]
+        labels = [f"<{bounds[0]}ms"] + [f"{low}-{high}ms" for low, high in zip(bounds, bounds[1:])] + [f">={bounds[-1]}ms"]
+        return dict(zip(labels, counts))
+
+    def draw_overlay(self, screen, fps):
+        """
+        Draws FPS, median and 99th percentile frame times, the slowest phases and the state of the cProfile capture
+        in the top right corner.
+
+        The text is only re-rendered a few times per second.
+
+        Parameters:
+        - screen (pygame.Surface): The surface to draw on.
+        - fps (float): The measured frames per second.
+        """
+
+        if not self.overlay_visible or not self.frame_times:
+            return
+
+        self.frames_since_overlay -= 1
+        if self.frames_since_overlay <= 0:
+            self.frames_since_overlay = 30
+            ordered = sorted(self.frame_times)
+            lines = [
+                f"FPS: {fps:.0f}",
+                f"Frame p50: {percentile(ordered, 0.5) * 1000:.2f} ms  p99: {percentile(ordered, 0.99) * 1000:.2f} ms",
+            ]
+            lines += [f"{name}: {mean * 1000:.2f} ms" for name, mean in self.get_phase_means()[:4]]
+            if self.allocated_blocks:
+                blocks = sorted(self.allocated_blocks)
+                lines.append(f"Blocks/frame p50: {percentile(blocks, 0.5)}  max: {blocks[-1]}  GC: {self.gc_collections}")
+            if self.cprofile is not None:
+                lines.append(f"cProfile: {self.cprofile_frames} frames left")
+            elif self.cprofile_written is not None:
+                lines.append(f"Profile written to {self.cprofile_written}")
+
+            font = cache.get_font(None, 22)
+            self.overlay_lines = [font.render(line, True, (255, 255, 0)) for line in lines]
+
+        y = 10
+        for line in self.overlay_lines:
+            screen.blit(line, (screen.get_width() - line.get_width() - 10, y))
+            y += line.get_height()
@@ -0,0 +1,197 @@
+import concurrent.futures
+import sqlite3
+import sys
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    level TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    score INTEGER NOT NULL,
+    health INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    outcome TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_level ON runs (level, score DESC);
+"""
+
+COLUMNS = ("level", "finished_at", "duration", "score", "health", "items", "outcome")
+
+class RunHistory:
+    def __init__(self, path):
+        """
+        Initializes a RunHistory that stores every finished run in a local SQLite database.
+
+        All database work runs on one background thread, so the game loop never waits for the disk. record() only adds the
+        run to a list, and runs recorded while a write is in progress are written together in the next transaction.
+        Queries are answered on the same thread, after the writes before them, and return a concurrent.futures.Future
+        that the game can check each frame with done().
+
+        If the database can't be opened, written or read, the error is printed and the history turns itself off: later
+        runs aren't recorded and queries return None.
+
+        Parameters:
+        - path (str): The file path to the database. ":memory:" keeps the history only while the game runs.
+        """
+
+        self.path = path
+        self.connection = None
+        self.failed = False
+
+        self.pending = []
+        self.lock = threading.Lock()
+        self.flush_scheduled = False
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="run-history")
+
+    def connect(self):
+        """
+        Opens the database on the background thread the first time it is used.
+
+        Returns:
+        - sqlite3.Connection: The connection, only used from the background thread.
+        """
+
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path)
+            # Readers don't block the writer and a commit doesn't wait for the whole file to be synced
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+        return self.connection
+
+    def report(self, error, action):
+        """
+        Prints a database error and turns the history off.
+
+        Parameters:
+        - error (sqlite3.Error): The error.
+        - action (str): What failed, e.g. "write 2 runs".
+        """
+
+        if not self.failed:
+            print(f"Run history {self.path} turned off, couldn't {action}: {error}", file=sys.stderr)
+        self.failed = True
+
+    def record(self, level, duration, score, health, items, outcome):
+        """
+        Adds a finished run to the history. Returns right away, the run is written in the background.
+
+        Parameters:
+        - level (str): The name of the level.
+        - duration (float): The time played in seconds.
+        - score (int): The player's score at the end of the run.
+        - health (int): The player's health at the end of the run.
+        - items (int): The number of items collected.
+        - outcome (str): How the run ended, e.g. "victory", "fired" or "died".
+        """
+
+        if self.failed:
+            return
+
+        with self.lock:
+            self.pending.append((level, time.time(), duration, score, health, items, outcome))
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+
+        self.executor.submit(self.flush)
+
+    def flush(self):
+        """
+        Writes the recorded runs in one transaction. Runs on the background thread.
+        """
+
+        with self.lock:
+            runs = self.pending
+            self.pending = []
+            self.flush_scheduled = False
+
+        if not runs or self.failed:
+            return
+
+        try:
+            connection = self.connect()
+            with connection:
+                connection.executemany(f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", runs)
+        except sqlite3.Error as error:
+            self.report(error, f"write {len(runs)} run(s)")
+
+    def query(self, sql, parameters=(), first_row=False):
+        """
+        Runs a query on the background thread, after the runs recorded so far have been written.
+
+        Parameters:
+        - sql (str): The SELECT statement.
+        - parameters (tuple): The values for its placeholders.
+        - first_row (bool): True to only return the first row, e.g. of an aggregate query.
+
+        Returns:
+        - concurrent.futures.Future: Resolves to the rows as dicts, or to the first row. Holds the sqlite3.Error instead if
+          the query failed. None if the history is turned off.
+        """
+
+        if self.failed:
+            return None
+
+        def run_query():
+            self.flush()
+            try:
+                cursor = self.connect().execute(sql, parameters)
+                names = [column[0] for column in cursor.description]
+                rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+            except sqlite3.Error as error:
+                self.report(error, "read the runs")
+                raise
+            return rows[0] if first_row else rows
+
+        return self.executor.submit(run_query)
+
+    def get_top_runs(self, limit=10, level=None):
+        """
+        Requests the leaderboard: the runs with the highest scores.
+
+        Parameters:
+        - limit (int): The number of runs.
+        - level (str): Only include runs of this level. None includes every level.
+
+        Returns:
+        - concurrent.futures.Future: Resolves to a list of runs as dicts, best first. None if the history is turned off.
+        """
+
+        if level is None:
+            return self.query("SELECT * FROM runs ORDER BY score DESC LIMIT ?", (limit,))
+        return self.query("SELECT * FROM runs WHERE level = ? ORDER BY score DESC LIMIT ?", (level, limit))
+
+    def get_level_stats(self, level):
+        """
+        Requests statistics about the runs of a level.
+
+        Parameters:
+        - level (str): The name of the level.
+
+        Returns:
+        - concurrent.futures.Future: Resolves to a dict with the number of runs and victories, the best and average score
+          and the average duration in seconds. None if the history is turned off.
+        """
+
+        return self.query(
+            "SELECT COUNT(*) AS runs, COALESCE(SUM(outcome = 'victory'), 0) AS victories, MAX(score) AS best_score,"
+            " AVG(score) AS average_score, AVG(duration) AS average_duration FROM runs WHERE level = ?", (level,), first_row=True)
+
+    def close(self):
+        """
+        Writes the remaining runs and closes the database, waiting for the background thread to finish.
+        """
+
+        def close_connection():
+            self.flush()
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+        self.executor.submit(close_connection)
+        self.executor.shutdown(wait=True)
@@ -1,20 +1,100 @@
 import pygame
 import os
-import sys
+from asset_cache import cache
+
+class GlyphAtlas:
+    def __init__(self, font, color):
+        """
+        Initializes a GlyphAtlas that renders each piece of text once and builds numbers from cached digit glyphs.
+
+        Parameters:
+        - font (pygame.font.Font): The font to render with.
+        - color (tuple): The RGB color of the text.
+        """
+
+        self.font = font
+        self.color = color
+        self.glyphs = {}
+
+    def get_glyph(self, text):
+        """
+        Returns the rendered text, rasterizing it only the first time it is requested.
+
+        Parameters:
+        - text (str): The text to render.
+
+        Returns:
+        - pygame.Surface: The rendered text.
+        """
+
+        glyph = self.glyphs.get(text)
+        if glyph is None:
+            glyph = self.font.render(text, True, self.color)
+            self.glyphs[text] = glyph
+        return glyph
+
+    def render_number(self, prefix, number, suffix=""):
+        """
+        Builds a line of text from a cached prefix, the digits of a number and a cached suffix.
+
+        Parameters:
+        - prefix (str): The text in front of the number.
+        - number (int): The number to show.
+        - suffix (str): The text after the number.
+
+        Returns:
+        - pygame.Surface: The composed line of text.
+        """
+
+        pieces = [self.get_glyph(prefix)] + [self.get_glyph(character) for character in str(number)]
+        if suffix:
+            pieces.append(self.get_glyph(suffix))
+
+        width = sum(piece.get_width() for piece in pieces)
+        height = max(piece.get_height() for piece in pieces)
+        line = pygame.Surface((width, height), pygame.SRCALPHA)
+
+        x = 0
+        for piece in pieces:
+            line.blit(piece, (x, 0))
+            x += piece.get_width()
+        return line
 
 class Scoreboard(pygame.sprite.Sprite):
-    def __init__(self, player):
+    def __init__(self, player, quota):
         """
         Initializes a Scoreboard object for displaying player-related information on the screen.
 
         Parameters:
         - player (Player): The player object associated with the scoreboard.
+        - quota (int): The profit quota shown next to the score.
         """
         
         super().__init__()
         self.player = player
-        pygame.font.init()
-        self.font = pygame.font.SysFont("Arial", 24)
+        self.quota_suffix = f" / {quota}"
+        self.font = cache.get_font("Arial", 24)
+        self.glyphs = GlyphAtlas(self.font, (255, 255, 255))
+
+        # The rendered lines are only rebuilt when the values they show change
+        self.shown_score = None
+        self.shown_health = None
+        self.scoreboard_text = None
+        self.health_text = None
+
+        # The best score of the level from the run history, shown once the background query has finished
+        self.best_score_request = None
+        self.best_score_text = None
+
+    def show_best_score(self, request):
+        """
+        Shows the level's best score under the health once it is known.
+
+        Parameters:
+        - request (concurrent.futures.Future): A pending RunHistory.get_level_stats() query, or None.
+        """
+
+        self.best_score_request = request
 
     def draw(self, screen):
         """
@@ -24,11 +104,42 @@ class Scoreboard(pygame.sprite.Sprite):
         - screen (pygame.Surface): The surface where the scoreboard will be drawn.
         """
 
-        scoreboard_text = self.font.render(f"Profit Quota: {self.player.score} / 624", True, (255, 255, 255))
-        screen.blit(scoreboard_text, (10, 10))
+        if self.player.score != self.shown_score:
+            self.shown_score = self.player.score
+            self.scoreboard_text = self.glyphs.render_number("Profit Quota: ", self.player.score, self.quota_suffix)
+        screen.blit(self.scoreboard_text, (10, 10))
+
+        if self.player.health != self.shown_health:
+            self.shown_health = self.player.health
+            self.health_text = self.glyphs.render_number("Health: ", self.player.health)
+        screen.blit(self.health_text, (10, 40))
+
+        # Checking the query doesn't wait for it, the line appears in the first frame after it finished
+        if self.best_score_request is not None and self.best_score_request.done():
+            request = self.best_score_request
+            self.best_score_request = None
+            # A failed query was already reported by the run history, the line is left out
+            best_score = request.result()["best_score"] if request.exception() is None else None
+            if best_score is not None:
+                self.best_score_text = self.glyphs.render_number("Best: ", best_score)
+        if self.best_score_text is not None:
+            screen.blit(self.best_score_text, (10, 70))
+
+    def get_drawables(self):
+        """
+        Returns the text lines drawn by the last call to draw, for tracking which parts of the screen changed.
 
-        health_text = self.font.render(f"Health: {self.player.health}", True, (255, 255, 255))
-        screen.blit(health_text, (10, 40))
+        Returns:
+        - list: (key, image, (x, y)) entries for each line.
+        """
+
+        if self.scoreboard_text is None:
+            return []
+
+        drawables = [(("scoreboard", "score"), self.scoreboard_text, (10, 10)), (("scoreboard", "health"), self.health_text, (10, 40))]
+        if self.best_score_text is not None:
+            drawables.append((("scoreboard", "best"), self.best_score_text, (10, 70)))
+        return drawables
 
 class ReplayButton(pygame.sprite.Sprite):
     def __init__(self, width, height):
@@ -42,7 +153,7 @@ class ReplayButton(pygame.sprite.Sprite):
         super().__init__()
 
         self.parent_path = "assets/buttons/"
-        self.image = pygame.image.load(os.path.join(self.parent_path, "replay_button.png")).convert_alpha()
+        self.image = cache.get_image(os.path.join(self.parent_path, "replay_button.png"))
         self.rect = self.image.get_rect()
         self.rect.center = (width // 2, height // 2)
         self.visible = True
@@ -87,16 +198,17 @@ class VictoryScreen:
         self.screen = screen
         self.game_instance = game_instance
 
-    def show(self, text):
+    def show(self, text, leaderboard=None):
         """
         Displays the victory screen with the specified text and waits for user input.
 
         Parameters:
         - text (str): The text to be displayed on the victory screen.
+        - leaderboard (concurrent.futures.Future): A pending RunHistory.get_top_runs() query, listed below the text once it has finished.
         """
 
         # Display victory-related content
-        font = pygame.font.Font(None, 36)
+        font = cache.get_font(None, 36)
         text = font.render(text, True, (255, 255, 255))
         text_rect = text.get_rect(center=(self.screen.get_width() // 2, self.screen.get_height() // 2))
 
@@ -106,11 +218,36 @@ class VictoryScreen:
         pygame.display.flip()
 
         # Wait for user input to continue or exit
+        clock = pygame.time.Clock()
         waiting = True
         while waiting:
+            if leaderboard is not None and leaderboard.done():
+                # A failed query was already reported by the run history, the victory text stays on its own
+                if leaderboard.exception() is None:
+                    self.draw_leaderboard(leaderboard.result(), text_rect.bottom + 30)
+                    pygame.display.flip()
+                leaderboard = None
+
+            clock.tick(30)
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    self.game_instance.quit()
                 elif event.type == pygame.KEYDOWN:
                     self.game_instance.reset()
+                    waiting = False
+
+    def draw_leaderboard(self, runs, top):
+        """
+        Draws the best runs below the victory text.
+
+        Parameters:
+        - runs (list): The runs from RunHistory.get_top_runs(), best first.
+        - top (int): The y-coordinate of the first line.
+        """
+
+        font = cache.get_font(None, 28)
+        y = top
+        for place, run in enumerate(runs, 1):
+            line = font.render(f"{place}. {run['score']} points, {run['items']} items, {run['duration']:.0f} s", True, (255, 255, 255))
+            self.screen.blit(line, line.get_rect(midtop=(self.screen.get_width() // 2, y)))
+            y += line.get_height() + 4
@@ -0,0 +1,137 @@
+class SpawnRecord:
+    def __init__(self, spawn, index):
+        """
+        Initializes a SpawnRecord that tracks the entity created for a spawn point.
+
+        Parameters:
+        - spawn (dict): The spawn point from the map's object layers.
+        - index (int): The position of the spawn point in the map's list, which identifies its entity for the whole level.
+        """
+
+        self.spawn = spawn
+        self.index = index
+        self.entity = None
+        self.group = None
+
+        # Set once the entity has left its group on its own, e.g. a collected item
+        self.consumed = False
+
+class Spawner:
+    def __init__(self, spawns, factories, region_size=512, margin=256):
+        """
+        Initializes a Spawner that creates entities only when the camera gets close to them.
+
+        The map is divided into square regions. Regions near the camera are active, their entities are created on first use
+        and added to their groups. Entities in regions that fall far behind are suspended by removing them from their groups,
+        so they keep their state but cost nothing per frame.
+
+        Parameters:
+        - spawns (list): The spawn points from the map's object layers.
+        - factories (dict): Maps a spawn type to a function that takes a spawn point and returns the new entity and its sprite group.
+        - region_size (int): The width and height in pixels of each region.
+        - margin (int): How far in pixels outside the view regions are activated. They are suspended at twice this distance.
+        """
+
+        self.factories = factories
+        self.region_size = region_size
+        self.margin = margin
+        self.active_regions = set()
+
+        self.regions = {}
+        for index, spawn in enumerate(spawns):
+            if spawn["type"] in factories:
+                region = (int(spawn["x"]) // region_size, int(spawn["y"]) // region_size)
+                self.regions.setdefault(region, []).append(SpawnRecord(spawn, index))
+
+    def get_regions(self, rect):
+        """
+        Returns the regions that contain spawn points and overlap a rectangle.
+
+        Parameters:
+        - rect (pygame.Rect): The rectangle in map coordinates.
+
+        Returns:
+        - set: The (column, row) regions.
+        """
+
+        left = rect.left // self.region_size
+        top = rect.top // self.region_size
+        right = (rect.right - 1) // self.region_size
+        bottom = (rect.bottom - 1) // self.region_size
+        return {(x, y) for y in range(top, bottom + 1) for x in range(left, right + 1) if (x, y) in self.regions}
+
+    def update(self, viewport):
+        """
+        Activates the regions near the viewport and suspends the ones that are far away.
+
+        Parameters:
+        - viewport (pygame.Rect): The part of the map visible on the screen.
+        """
+
+        near_regions = self.get_regions(viewport.inflate(self.margin * 2, self.margin * 2))
+        far_regions = self.get_regions(viewport.inflate(self.margin * 4, self.margin * 4))
+
+        # Regions stay active until they leave the wider area, so entities don't flicker in and out at the border
+        active_regions = near_regions | (self.active_regions & far_regions)
+
+        for region in self.active_regions - active_regions:
+            self.suspend_region(region)
+        for region in active_regions - self.active_regions:
+            self.activate_region(region)
+
+        self.active_regions = active_regions
+
+    def activate_region(self, region):
+        """
+        Creates or resumes the entities of a region.
+
+        Parameters:
+        - region (tuple): The (column, row) region.
+        """
+
+        for record in self.regions[region]:
+            if record.entity is None:
+                record.entity, record.group = self.factories[record.spawn["type"]](record.spawn)
+            if not record.consumed:
+                record.group.add(record.entity)
+
+    def suspend_region(self, region):
+        """
+        Removes the entities of a region from their groups while keeping their state.
+
+        Parameters:
+        - region (tuple): The (column, row) region.
+        """
+
+        for record in self.regions[region]:
+            if record.entity is not None:
+                if record.entity.alive():
+                    record.group.remove(record.entity)
+                else:
+                    record.consumed = True
+
+    def get_active_records(self):
+        """
+        Returns the records of the entities that are currently in their groups.
+
+        Returns:
+        - list: The SpawnRecords of the live entities in the active regions.
+        """
+
+        return [record for region in self.active_regions for record in self.regions[region]
+                if record.entity is not None and record.entity.alive()]
+
+    def reset(self):
+        """
+        Removes all spawned entities so the level starts over from its spawn points.
+        """
+
+        for records in self.regions.values():
+            for record in records:
+                if record.entity is not None:
+                    record.group.remove(record.entity)
+                record.entity = None
+                record.group = None
+                record.consumed = False
+
+        self.active_regions = set()
@@ -0,0 +1,506 @@
+import argparse
+import json
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+
+# Every entity is sent as these whole numbers. Positions are quantized to POSITION_STEP pixels.
+FIELDS = ("kind", "x", "y", "frame", "health", "score")
+POSITION_STEP = 2
+
+KIND_PLAYER = 0
+KIND_ENEMY = 1
+KIND_ITEM = 2
+
+# The player is entity 0, spawned entities are numbered after their spawn point, starting at 1
+PLAYER_ID = 0
+
+# The player's animation states, sent as part of its frame number
+PLAYER_STATES = ("idle", "run-left", "run-right", "idle-right", "idle-left", "jump-right", "jump-left")
+
+# Messages are prefixed with their length, acknowledgements are the received tick
+LENGTH = struct.Struct("<I")
+ACK = struct.Struct("<I")
+
+def write_varint(buffer, value):
+    """
+    Appends a signed number to a buffer in as few bytes as it needs, 1 byte for -64 to 63.
+
+    Parameters:
+    - buffer (bytearray): The buffer to append to.
+    - value (int): The number.
+    """
+
+    # Zigzag encoding puts small negative numbers next to small positive ones
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def read_varint(data, offset):
+    """
+    Reads a number written by write_varint().
+
+    Parameters:
+    - data (bytes): The message.
+    - offset (int): Where the number starts.
+
+    Returns:
+    - tuple: The number and the offset after it.
+    """
+
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), offset
+
+def encode_delta(tick, state, base_tick=None, base_state=None):
+    """
+    Packs a state into a binary message holding only what changed since a base state the receiver already has.
+
+    The message lists the tick, the base tick, every entity that is new or has changed fields, with a bit mask of those
+    fields and their differences to the base, and then the entities that are gone. Without a base, the differences are
+    to zero and the message holds the whole state.
+
+    Parameters:
+    - tick (int): The tick of the state.
+    - state (dict): Maps entity ids to tuples with a value for each of FIELDS.
+    - base_tick (int): The tick of the base state, None for a full state.
+    - base_state (dict): The base state.
+
+    Returns:
+    - bytes: The message.
+    """
+
+    if base_state is None:
+        base_state = {}
+
+    changes = bytearray()
+    changed = 0
+    empty = (0,) * len(FIELDS)
+    for entity_id, values in state.items():
+        base_values = base_state.get(entity_id)
+        if base_values == values:
+            continue
+
+        if base_values is None:
+            base_values = empty
+        mask = 0
+        for field, (value, base_value) in enumerate(zip(values, base_values)):
+            if value != base_value:
+                mask |= 1 << field
+
+        write_varint(changes, entity_id)
+        changes.append(mask)
+        for field, (value, base_value) in enumerate(zip(values, base_values)):
+            if mask & (1 << field):
+                write_varint(changes, value - base_value)
+        changed += 1
+
+    removed = [entity_id for entity_id in base_state if entity_id not in state]
+
+    message = bytearray()
+    write_varint(message, tick)
+    write_varint(message, -1 if base_tick is None else base_tick)
+    write_varint(message, changed)
+    message += changes
+    write_varint(message, len(removed))
+    for entity_id in removed:
+        write_varint(message, entity_id)
+    return bytes(message)
+
+def decode_delta(data, states):
+    """
+    Unpacks a message from encode_delta().
+
+    Parameters:
+    - data (bytes): The message.
+    - states (dict): The states received before, by tick. The message's base state has to be among them.
+
+    Returns:
+    - tuple: The tick and the full state.
+    """
+
+    tick, offset = read_varint(data, 0)
+    base_tick, offset = read_varint(data, offset)
+    state = dict(states[base_tick]) if base_tick >= 0 else {}
+
+    empty = (0,) * len(FIELDS)
+    changed, offset = read_varint(data, offset)
+    for _ in range(changed):
+        entity_id, offset = read_varint(data, offset)
+        mask = data[offset]
+        offset += 1
+
+        values = list(state.get(entity_id, empty))
+        for field in range(len(FIELDS)):
+            if mask & (1 << field):
+                difference, offset = read_varint(data, offset)
+                values[field] += difference
+        state[entity_id] = tuple(values)
+
+    removed, offset = read_varint(data, offset)
+    for _ in range(removed):
+        entity_id, offset = read_varint(data, offset)
+        del state[entity_id]
+    return tick, state
+
+class StreamClient:
+    def __init__(self, connection, address):
+        """
+        Initializes a StreamClient that tracks what one spectator has received.
+
+        Parameters:
+        - connection (socket.socket): The connection to the spectator.
+        - address (tuple): The spectator's address.
+        """
+
+        self.connection = connection
+        self.address = address
+
+        # The states sent but not yet acknowledged, by tick, and the newest acknowledged one
+        self.sent_states = {}
+        self.acked_tick = None
+        self.acked_state = None
+        self.received = b""
+        # The messages the connection couldn't take yet, sent when it becomes writable
+        self.outgoing = bytearray()
+
+        self.connected_at = time.perf_counter()
+        self.bytes_sent = 0
+        self.messages_sent = 0
+
+class StateStreamServer:
+    def __init__(self, host="127.0.0.1", port=0, send_rate=30, history=64, max_backlog=1 << 20):
+        """
+        Initializes a StateStreamServer that streams the game state to spectator or ghost-race clients over TCP.
+
+        The game loop only hands over the newest state with publish(). A background thread accepts clients, reads their
+        acknowledgements and sends each client the difference between the newest state and the last state it acknowledged.
+        States published faster than send_rate are skipped, so a slow client never holds up the game. The sockets never
+        block: what a client can't take yet waits in its outgoing buffer, and a client that lets it grow past max_backlog
+        bytes is disconnected.
+
+        Parameters:
+        - host (str): The address to listen on.
+        - port (int): The port to listen on. 0 picks a free port, see the port attribute.
+        - send_rate (int): The maximum number of states sent to each client per second.
+        - history (int): The number of unacknowledged states kept per client. A client that falls further behind gets full states.
+        - max_backlog (int): The number of unsent bytes after which a client is disconnected.
+        """
+
+        self.send_rate = send_rate
+        self.history = history
+        self.max_backlog = max_backlog
+
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.clients = []
+
+        self.tick = 0
+        self.latest = None
+        self.lock = threading.Lock()
+        self.published = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="state-stream", daemon=True)
+        self.thread.start()
+
+    def publish(self, state):
+        """
+        Hands the newest state to the sender thread. Returns right away.
+
+        Parameters:
+        - state (dict): Maps entity ids to tuples with a value for each of FIELDS.
+        """
+
+        self.tick += 1
+        with self.lock:
+            self.latest = (self.tick, state)
+        self.published.set()
+
+    def run(self):
+        """
+        The sender thread: waits for new states and sends them at most send_rate times per second.
+        """
+
+        while self.running:
+            if not self.published.wait(0.1):
+                self.poll()
+                continue
+
+            self.published.clear()
+            if not self.running:
+                break
+            with self.lock:
+                tick, state = self.latest
+
+            self.poll()
+            for client in list(self.clients):
+                self.send(client, tick, state)
+
+            time.sleep(1 / self.send_rate)
+
+    def poll(self):
+        """
+        Accepts new clients, reads the acknowledgements that have arrived and sends what waits in the outgoing buffers of
+        the clients that can take more, without waiting.
+        """
+
+        for key, events in self.selector.select(0):
+            if key.fileobj is self.listener:
+                connection, address = self.listener.accept()
+                connection.setblocking(False)
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                client = StreamClient(connection, address)
+                self.clients.append(client)
+                self.selector.register(connection, selectors.EVENT_READ, client)
+                continue
+
+            client = key.data
+            if events & selectors.EVENT_READ:
+                self.receive(client)
+            if events & selectors.EVENT_WRITE and client in self.clients:
+                self.flush(client)
+
+    def receive(self, client):
+        """
+        Reads a client's acknowledgements and moves its base state forward.
+
+        Parameters:
+        - client (StreamClient): The client with data waiting.
+        """
+
+        try:
+            data = client.connection.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.disconnect(client)
+            return
+
+        data = client.received + data
+        whole = len(data) - len(data) % ACK.size
+        client.received = data[whole:]
+        for (tick,) in ACK.iter_unpack(data[:whole]):
+            state = client.sent_states.get(tick)
+            if state is not None and (client.acked_tick is None or tick > client.acked_tick):
+                client.acked_tick = tick
+                client.acked_state = state
+
+        # Older states can't become the base any more
+        if client.acked_tick is not None:
+            client.sent_states = {tick: state for tick, state in client.sent_states.items() if tick >= client.acked_tick}
+
+    def send(self, client, tick, state):
+        """
+        Sends a client the newest state as a difference to the last state it acknowledged.
+
+        Parameters:
+        - client (StreamClient): The client.
+        - tick (int): The tick of the state.
+        - state (dict): The state.
+        """
+
+        if len(client.sent_states) >= self.history:
+            # The client stopped acknowledging, start over with a full state
+            client.sent_states = {}
+            client.acked_tick = None
+            client.acked_state = None
+
+        try:
+            message = encode_delta(tick, state, client.acked_tick, client.acked_state)
+            message = LENGTH.pack(len(message)) + message
+        except (TypeError, ValueError, OverflowError, struct.error) as error:
+            print(f"Couldn't encode state {tick} for {client.address[0]}:{client.address[1]}: {error}", file=sys.stderr)
+            return
+
+        if len(client.outgoing) + len(message) > self.max_backlog:
+            # The client stopped reading, don't keep its messages forever
+            self.disconnect(client)
+            return
+
+        client.sent_states[tick] = state
+        client.outgoing += message
+        client.bytes_sent += len(message)
+        client.messages_sent += 1
+        self.flush(client)
+
+    def flush(self, client):
+        """
+        Sends as much of a client's outgoing buffer as its connection takes without waiting, and waits for the connection
+        to become writable if something is left.
+
+        Parameters:
+        - client (StreamClient): The client.
+        """
+
+        try:
+            sent = client.connection.send(client.outgoing)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self.disconnect(client)
+            return
+        del client.outgoing[:sent]
+
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if client.outgoing else selectors.EVENT_READ
+        if self.selector.get_key(client.connection).events != events:
+            self.selector.modify(client.connection, events, client)
+
+    def disconnect(self, client):
+        """
+        Forgets a client that closed its connection.
+
+        Parameters:
+        - client (StreamClient): The client.
+        """
+
+        self.selector.unregister(client.connection)
+        client.connection.close()
+        self.clients.remove(client)
+
+    def get_stats(self):
+        """
+        Returns the bandwidth used by each connected client.
+
+        Returns:
+        - list: A dict for each client with its address, messages, bytes and bytes per second.
+        """
+
+        now = time.perf_counter()
+        stats = []
+        for client in list(self.clients):
+            elapsed = now - client.connected_at
+            stats.append({
+                "address": f"{client.address[0]}:{client.address[1]}",
+                "messages": client.messages_sent,
+                "bytes": client.bytes_sent,
+                "bytes_per_s": round(client.bytes_sent / elapsed) if elapsed else 0,
+                "mean_message_bytes": round(client.bytes_sent / client.messages_sent, 1) if client.messages_sent else 0,
+            })
+        return stats
+
+    def close(self, timeout=1):
+        """
+        Stops the sender thread and disconnects every client.
+
+        Parameters:
+        - timeout (float): The number of seconds to wait for the sender thread.
+        """
+
+        self.running = False
+        self.published.set()
+        self.thread.join(timeout)
+        for client in list(self.clients):
+            self.disconnect(client)
+        self.selector.close()
+        self.listener.close()
+
+class SpectatorClient:
+    def __init__(self, host, port, history=64):
+        """
+        Initializes a SpectatorClient that receives the game state streamed by a StateStreamServer.
+
+        Parameters:
+        - host (str): The address of the server.
+        - port (int): The port of the server.
+        - history (int): The number of received states kept as possible bases for the next messages.
+        """
+
+        self.connection = socket.create_connection((host, port))
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.history = history
+        self.states = {}
+        self.received = b""
+
+        self.bytes_received = 0
+        self.messages_received = 0
+
+    def read_exactly(self, size):
+        """
+        Waits until a number of bytes has arrived.
+
+        Parameters:
+        - size (int): The number of bytes.
+
+        Returns:
+        - bytes: The bytes.
+        """
+
+        while len(self.received) < size:
+            data = self.connection.recv(65536)
+            if not data:
+                raise ConnectionError("The server closed the connection")
+            self.received += data
+
+        data = self.received[:size]
+        self.received = self.received[size:]
+        return data
+
+    def receive(self):
+        """
+        Waits for the next state and acknowledges it.
+
+        Returns:
+        - tuple: The tick and the full state, mapping entity ids to tuples with a value for each of FIELDS.
+        """
+
+        (length,) = LENGTH.unpack(self.read_exactly(LENGTH.size))
+        tick, state = decode_delta(self.read_exactly(length), self.states)
+
+        self.states[tick] = state
+        if len(self.states) > self.history:
+            del self.states[min(self.states)]
+        self.connection.sendall(ACK.pack(tick))
+
+        self.bytes_received += LENGTH.size + length
+        self.messages_received += 1
+        return tick, state
+
+    def close(self):
+        self.connection.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a World Of Magic game streamed with STREAM_PORT and report the bandwidth as JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address of the game")
+    parser.add_argument("--port", type=int, default=8765, help="port of the game")
+    parser.add_argument("--seconds", type=float, default=10, help="how long to watch")
+    args = parser.parse_args(argv)
+
+    client = SpectatorClient(args.host, args.port)
+    start_time = time.perf_counter()
+    tick, state = None, {}
+    while time.perf_counter() - start_time < args.seconds:
+        tick, state = client.receive()
+    elapsed = time.perf_counter() - start_time
+    client.close()
+
+    player = state.get(PLAYER_ID)
+    print(json.dumps({
+        "messages": client.messages_received,
+        "bytes": client.bytes_received,
+        "bytes_per_s": round(client.bytes_received / elapsed),
+        "mean_message_bytes": round(client.bytes_received / client.messages_received, 1) if client.messages_received else 0,
+        "last_tick": tick,
+        "entities": len(state),
+        "player": dict(zip(FIELDS, player)) if player else None,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,57 @@
+class FixedTimestep:
+    def __init__(self, sim_rate=60, max_steps=5):
+        """
+        Initializes a FixedTimestep scheduler that runs the simulation at a constant rate, independent of the frame rate.
+
+        Parameters:
+        - sim_rate (int): The number of simulation steps per second.
+        - max_steps (int): The maximum number of steps to catch up on in a single frame.
+        """
+
+        self.sim_rate = sim_rate
+        self.step_time = 1 / sim_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_time):
+        """
+        Adds the time of the last frame and returns how many simulation steps are due.
+
+        If more than max_steps are due (for example after a long stall), the extra time is dropped
+        so a slow machine does not fall further and further behind.
+
+        Parameters:
+        - frame_time (float): The time in seconds since the previous frame.
+
+        Returns:
+        - int: The number of simulation steps to run this frame.
+        """
+
+        self.accumulator += frame_time
+        steps = int(self.accumulator // self.step_time)
+
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator %= self.step_time
+        else:
+            self.accumulator -= steps * self.step_time
+
+        return steps
+
+    @property
+    def alpha(self):
+        """
+        Returns how far the current frame lies between the last two simulation steps, used for interpolated rendering.
+
+        Returns:
+        - float: A value between 0 and 1.
+        """
+
+        return min(self.accumulator / self.step_time, 1.0)
+
+    def reset(self):
+        """
+        Discards any accumulated time, for example after a loading or victory screen.
+        """
+
+        self.accumulator = 0.0